@@ -0,0 +1,134 @@
+"""
+Compares the HTTP/1.1 session transport with the HTTP/2 transport on concurrent small calls.
+
+Starts a local HTTP/1.1 server and a local h2c (HTTP/2 over cleartext) server answering every
+request with a small JSON document after ``--delay`` seconds, sends ``--requests`` GET requests
+through ``Requests.map()`` and reports the throughput and the number of sockets each server accepted.
+
+Usage: ``python benchmarks/bench_http2.py [--requests 2000] [--workers 100] [--delay 0.01]``
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests_api import Requests
+
+import h2.config
+import h2.connection
+import h2.events
+
+
+BODY = json.dumps({"id": 1, "name": "item", "tags": ["a", "b"]}).encode("utf-8")
+
+
+def serve_http1(delay: float) -> tuple:
+    """ starts a threaded HTTP/1.1 server, returns ``(port, accepted sockets counter)`` """
+    accepted = [0]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 1024
+
+        def get_request(self):
+            accepted[0] += 1
+            return super().get_request()
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1], accepted
+
+
+class H2Protocol(asyncio.Protocol):
+    """ minimal h2c server answering every stream with ``BODY`` """
+
+    def __init__(self, delay: float, accepted: list):
+        self.delay = delay
+        self.accepted = accepted
+        self.connection = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.accepted[0] += 1
+        self.transport = transport
+        self.connection.initiate_connection()
+        self.transport.write(self.connection.data_to_send())
+
+    def data_received(self, data):
+        for event in self.connection.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                asyncio.get_event_loop().call_later(self.delay, self.respond, event.stream_id)
+        self.transport.write(self.connection.data_to_send())
+
+    def respond(self, stream_id: int):
+        if self.transport.is_closing():
+            return
+        self.connection.send_headers(stream_id, [
+            (":status", "200"),
+            ("content-type", "application/json"),
+            ("content-length", str(len(BODY)))
+        ])
+        self.connection.send_data(stream_id, BODY, end_stream=True)
+        self.transport.write(self.connection.data_to_send())
+
+
+def serve_http2(delay: float) -> tuple:
+    """ starts an asyncio h2c server in a thread, returns ``(port, accepted sockets counter)`` """
+    accepted = [0]
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+        loop.create_server(lambda: H2Protocol(delay, accepted), "127.0.0.1", 0, backlog=1024)
+    )
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1], accepted
+
+
+def run(transport: str, port: int, accepted: list, args: argparse.Namespace) -> None:
+    client = Requests(
+        f"127.0.0.1:{port}",
+        None,
+        schema="http",
+        pool_connections=1,
+        pool_maxsize=args.workers,
+        transport=transport
+    )
+    with client:
+        started = time.perf_counter()
+        results = client.map("GET", [f"items/{index}" for index in range(args.requests)], max_workers=args.workers)
+        elapsed = time.perf_counter() - started
+
+    errors = sum(isinstance(result, Exception) for result in results)
+    print(f"  {transport:<6} {args.requests / elapsed:10.0f} req/s {elapsed:8.2f} s "
+          f"{accepted[0]:6d} sockets {errors:6d} errors")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests, {args.workers} workers, {args.delay * 1000:.0f} ms server delay")
+    run("http1", *serve_http1(args.delay), args)
+    run("http2", *serve_http2(args.delay), args)
+
+
+if __name__ == "__main__":
+    main()
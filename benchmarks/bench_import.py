@@ -0,0 +1,65 @@
+"""
+Measures the cold-start cost of ``import requests_api`` in fresh interpreters.
+
+Compares importing ``requests`` alone, ``requests_api`` (optional backends loaded lazily) and
+``requests_api`` followed by every optional backend installed here, which is what importing the
+package used to cost. Also lists the optional backends a plain ``import requests_api`` loads.
+
+Usage: ``python benchmarks/bench_import.py [--repeat 20]``
+"""
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+
+# optional dependencies that are only imported on first use
+OPTIONAL_MODULES = ("requests_oauthlib", "requests_ntlm3", "requests_kerberos", "httpx", "asyncio", "ijson")
+
+
+def environment() -> dict:
+    """ environment of the interpreters, importing ``requests_api`` from the working directory """
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+
+
+def measure(statement: str, repeat: int) -> float:
+    """ best wall time, in seconds, of running ``statement`` in a fresh interpreter """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True, env=environment())
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    installed = [name for name in OPTIONAL_MODULES if importlib.util.find_spec(name) is not None]
+    cases = {
+        "python -c pass": "pass",
+        "import requests": "import requests",
+        "import requests_api": "import requests_api",
+        "import requests_api (eager)": "; ".join(["import requests_api"] + [f"import {name}" for name in installed]),
+    }
+
+    print(f"best of {args.repeat}, optional backends installed: {', '.join(installed) or 'none'}")
+    for name, statement in cases.items():
+        print(f"  {name:<30} {measure(statement, args.repeat) * 1000:8.1f} ms")
+
+    loaded = subprocess.run(
+        [sys.executable, "-c", f"import sys, requests_api; print([m for m in {OPTIONAL_MODULES!r} if m in sys.modules])"],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=environment()
+    ).stdout.strip()
+    print(f"  optional backends loaded by 'import requests_api': {loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares the single-pass ``search_keys`` lookup engine with one ``nested_lookup`` walk per key.
+
+Usage: ``python benchmarks/bench_lookup.py [--items 20000] [--keys 5] [--repeat 5]``
+"""
+import argparse
+import json
+import timeit
+
+from requests_api.lookup import compile_path, lookup
+
+try:
+    from nested_lookup import nested_lookup
+except ImportError:
+    nested_lookup = None
+
+
+def build_document(items: int) -> dict:
+    """ builds a nested document resembling a large list endpoint response """
+    return {
+        "total": items,
+        "items": [
+            {
+                "id": index,
+                "name": f"item-{index}",
+                "owner": {"id": index % 97, "name": f"owner-{index % 97}", "tags": ["a", "b"]},
+                "attributes": [{"key": f"k{attr}", "value": attr} for attr in range(5)],
+                "status": {"code": index % 3, "history": [{"code": 0}, {"code": 1}]},
+            }
+            for index in range(items)
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    document = json.loads(json.dumps(build_document(args.items)))
+    search_keys = ["id", "name", "key", "code", "value", "tags", "total"][:args.keys]
+    paths = [compile_path("items[*].id"), compile_path("items[*].owner.name")]
+
+    cases = {
+        "lookup (single pass)": lambda: lookup(search_keys, document),
+        "lookup (compiled paths)": lambda: lookup(paths, document),
+    }
+    if nested_lookup is not None:
+        expected = [item for key in search_keys for item in nested_lookup(key, document)]
+        assert lookup(search_keys, document) == expected, "results differ from nested_lookup"
+        cases["nested_lookup (per key)"] = lambda: [nested_lookup(key, document) for key in search_keys]
+
+    print(f"{args.items} items, {len(search_keys)} search keys, best of {args.repeat}")
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        print(f"  {name:<26} {best * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compares the per-call overhead of a prepared endpoint (``Requests.prepare``) with ``Requests.get``.
+
+By default the session sends through an in-process adapter answering every request with the
+same small JSON document, so only the work done by the client (URL encoding, header merging,
+request preparation, environment lookups, status validation and decoding) is measured. With
+``--loopback`` the requests go to the local stand-in server (``mockserver.py``) instead.
+
+Usage: ``python benchmarks/bench_prepare.py [--calls 20000] [--repeat 5] [--loopback]``
+"""
+import argparse
+import io
+import time
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests_api import Requests
+from suite import start_server
+
+BODY = b'{"id": 1, "name": "item", "owner": {"id": 2, "name": "owner"}}'
+
+
+class CannedAdapter(BaseAdapter):
+    """ answers every request with ``BODY``, without any I/O """
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None) -> Response:
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers["Content-Type"] = "application/json"
+        response.headers["Content-Length"] = str(len(BODY))
+        response.raw = io.BytesIO(BODY)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def measure(call, calls: int, repeat: int) -> float:
+    """ best mean seconds per call over ``repeat`` runs of ``calls`` calls """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            call()
+        elapsed = (time.perf_counter() - started) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--loopback", action="store_true", help="send to the local stand-in server")
+    args = parser.parse_args()
+
+    server = None
+    if args.loopback:
+        server, port = start_server()
+        client = Requests(f"127.0.0.1:{port}", ("user", "secret"), schema="http")
+        path = "/payload/100"
+        template = "/payload/{size}"
+    else:
+        client = Requests("api.example.com", ("user", "secret"), schema="http")
+        client.session.mount("http://", CannedAdapter())
+        path = "/users/1"
+        template = "/users/{size}"
+
+    try:
+        get_item = client.prepare("GET", template, query_params={"fields": "id,name"})
+        get_names = client.prepare("GET", template, query_params={"fields": "id,name"}, search_keys=["name"])
+        size = path.rsplit("/", 1)[-1]
+        cases = {
+            "Requests.get": lambda: client.get(path, query_params={"fields": "id,name"}),
+            "Requests.get + search_keys": lambda: client.get(
+                path, query_params={"fields": "id,name"}, search_keys=["name"]
+            ),
+            "prepare(...)": lambda: get_item(size=size),
+            "prepare(...) + search_keys": lambda: get_names(size=size),
+        }
+
+        # warm up the connection pool and the lazily imported modules
+        for case in cases.values():
+            measure(case, 100, 1)
+
+        print(f"{args.calls} calls, best of {args.repeat}, {'loopback server' if args.loopback else 'no I/O'}")
+        results = {name: measure(case, args.calls, args.repeat) for name, case in cases.items()}
+        baseline = results["Requests.get"]
+        for name, seconds in results.items():
+            print(f"  {name:<28} {seconds * 1e6:9.1f} us/call {baseline / seconds:6.2f}x")
+    finally:
+        client.close()
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
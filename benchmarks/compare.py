@@ -0,0 +1,60 @@
+"""
+Compares two result files of the benchmark suite (``benchmarks/suite.py``) and flags regressions.
+
+A case regressed when its requests/sec dropped, or its p99 latency or peak RSS grew, by more than
+``--threshold`` percent. Exits with status 1 when any case regressed, so it can gate a release.
+
+Usage: ``python benchmarks/compare.py BASELINE.json CANDIDATE.json [--threshold 10]``
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> tuple:
+    """ returns ``(system, results by case key)`` of a result file, failed cases excluded """
+    with open(path) as source:
+        data = json.load(source)
+    return data["system"], {result["key"]: result for result in data["results"] if "error" not in result}
+
+
+def change(before: float, after: float) -> float:
+    """ relative change in percent """
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+
+    baseline_system, baseline = load(args.baseline)
+    candidate_system, candidate = load(args.candidate)
+    for name, system in (("baseline", baseline_system), ("candidate", candidate_system)):
+        print(f"{name:<10} {system['commit'] or '-':<10} python {system['python']} on {system['platform']}")
+
+    regressions = []
+    print(f"{'case':<40} {'req/s':>9} {'p50':>8} {'p99':>8} {'rss':>8}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        rps = change(before["rps"], after["rps"])
+        p50 = change(before["p50_ms"], after["p50_ms"])
+        p99 = change(before["p99_ms"], after["p99_ms"])
+        rss = change(before["peak_rss_bytes"], after["peak_rss_bytes"])
+        regressed = rps < -args.threshold or p99 > args.threshold or rss > args.threshold
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<40} {rps:+8.1f}% {p50:+7.1f}% {p99:+7.1f}% {rss:+7.1f}%{'  REGRESSED' if regressed else ''}")
+
+    for key in sorted(baseline.keys() ^ candidate.keys()):
+        print(f"{key:<40} only in the {'baseline' if key in baseline else 'candidate'}")
+
+    print(f"{len(regressions)} of {len(baseline.keys() & candidate.keys())} cases regressed "
+          f"by more than {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Local stand-in server of the benchmark suite, serving JSON payloads of any size over HTTP or HTTPS.
+
+``/payload/<size>`` answers ``GET`` and ``DELETE`` with a JSON document of exactly ``size`` bytes
+(generated while it is written, so even 500 MB payloads cost the server no memory), ``HEAD`` with
+its headers only, and ``POST`` / ``PUT`` / ``PATCH`` by reading and discarding the request body and
+answering with a small JSON document. Sizes accept ``k`` / ``m`` / ``g`` suffixes.
+
+Runs in its own process, so its CPU time is not taken from the client being measured. Prints the
+port once listening.
+
+Usage: ``python benchmarks/mockserver.py [--port 0] [--tls CERT KEY]``
+"""
+import argparse
+import json
+import os
+import shutil
+import ssl
+import subprocess
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+# item repeated in the generated documents, so ``search_keys=["id"]`` has work to do
+ITEM = {"id": 1, "name": "item", "owner": {"id": 2, "name": "owner"}, "tags": ["a", "b"], "score": 0.5}
+ENCODED_ITEM = json.dumps(ITEM)
+
+# documents are ``{"items": [ITEM, ...], "pad": "..."}``, padded to the exact size
+PREFIX = '{"items": ['
+SUFFIX = '], "pad": ""}'
+
+# items written per chunk of a generated document
+CHUNK_ITEMS = 1024
+
+
+def parse_size(size: str) -> int:
+    """ parses ``100``, ``10k``, ``1m`` or ``1g`` into bytes """
+    size = size.strip().lower()
+    units = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+    if size[-1:] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+def encoded_size(size: int) -> int:
+    """ actual size of the document of ``size`` bytes, which cannot be smaller than an empty one """
+    return max(size, len(PREFIX) + len(SUFFIX))
+
+
+def layout(size: int) -> tuple:
+    """ returns ``(items, padding)`` of the document of ``size`` bytes """
+    room = size - len(PREFIX) - len(SUFFIX)
+    items = max(0, (room + 2) // (len(ENCODED_ITEM) + 2))
+    body = items * len(ENCODED_ITEM) + max(0, items - 1) * 2
+    return items, max(0, room - body)
+
+
+def document(size: int) -> dict:
+    """ document encoding to ``size`` bytes with ``json.dumps``, used as request body """
+    items, padding = layout(size)
+    return {"items": [ITEM] * items, "pad": "x" * padding}
+
+
+def chunks(size: int) -> Iterator[bytes]:
+    """ yields the encoded document of ``size`` bytes in chunks """
+    items, padding = layout(size)
+    yield PREFIX.encode("utf-8")
+    written = 0
+    while written < items:
+        count = min(CHUNK_ITEMS, items - written)
+        yield (", " if written else "").encode("utf-8") + ", ".join([ENCODED_ITEM] * count).encode("utf-8")
+        written += count
+    yield f'], "pad": "{"x" * padding}"}}'.encode("utf-8")
+
+
+def create_certificate(directory: str) -> tuple:
+    """ creates a self-signed certificate for ``127.0.0.1`` with ``openssl``, returns ``(cert, key)`` """
+    if shutil.which("openssl") is None:
+        raise RuntimeError("HTTPS benchmarks need the 'openssl' command to create a certificate.")
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"
+        ],
+        check=True,
+        capture_output=True
+    )
+    return cert, key
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # headers and body are separate writes, which Nagle's algorithm would
+    # hold back until the client's delayed ACK (~40 ms per request)
+    disable_nagle_algorithm = True
+
+    def size(self) -> int:
+        return parse_size(self.path.rstrip("/").rsplit("/", 1)[-1].split("?")[0])
+
+    def do_GET(self):
+        size = self.size()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(encoded_size(size)))
+        self.end_headers()
+        if self.command != "HEAD":
+            for chunk in chunks(size):
+                self.wfile.write(chunk)
+
+    do_HEAD = do_DELETE = do_GET
+
+    def do_POST(self):
+        remaining = int(self.headers.get("Content-Length") or 0)
+        received = remaining
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+        body = json.dumps({"id": 1, "received": received}).encode("utf-8")
+        self.send_response(201 if self.command == "POST" else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_PUT = do_PATCH = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--tls", nargs=2, metavar=("CERT", "KEY"))
+    args = parser.parse_args()
+
+    server = Server(("127.0.0.1", args.port), Handler)
+    if args.tls:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*args.tls)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    print(server.server_address[1], flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
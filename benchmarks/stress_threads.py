@@ -0,0 +1,121 @@
+"""
+Hammers one shared ``Requests`` instance from many threads and checks for cross-talk.
+
+Starts a local HTTP/1.1 echo server, then every thread sends GET and POST requests with its own
+path, query parameters, per-call headers and body through the same instance (and connection
+pool). Each response must echo exactly what its call sent, and the configuration of the instance
+must be unchanged afterwards. Reports the throughput and the number of sockets the server accepted.
+
+Usage: ``python benchmarks/stress_threads.py [--threads 64] [--calls 200] [--pool 16]``
+"""
+import argparse
+import json
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+from requests_api import Requests, HistogramAggregator, MemoryCache, RetryPolicy
+
+
+def serve() -> tuple:
+    """ starts an echo server, returns ``(port, accepted sockets counter)`` """
+    accepted = [0]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            parts = urlsplit(self.path)
+            body = json.dumps({
+                "path": parts.path,
+                "query": dict(parse_qsl(parts.query)),
+                "call": self.headers.get("X-Call"),
+                "content_type": self.headers.get("Content-type"),
+                "body": json.loads(self.rfile.read(length)) if length else None
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_POST = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 1024
+
+        def get_request(self):
+            accepted[0] += 1
+            return super().get_request()
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1], accepted
+
+
+def worker(client: Requests, thread: int, calls: int) -> int:
+    """ sends ``calls`` requests, returns the number of responses that did not match their call """
+    mismatches = 0
+    for index in range(calls):
+        call = f"{thread}-{index}"
+        path = f"/threads/{thread}/calls/{index}"
+        if index % 2:
+            result = client.post(path, {"call": call}, {"thread": thread, "index": index}, headers={"X-Call": call})
+            expected_body = {"thread": thread, "index": index}
+        else:
+            result = client.get(path, {"call": call}, headers={"X-Call": call})
+            expected_body = None
+        mismatches += result != {
+            "path": path,
+            "query": {"call": call},
+            "call": call,
+            "content_type": "application/json",
+            "body": expected_body
+        }
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--pool", type=int, default=16)
+    args = parser.parse_args()
+
+    port, accepted = serve()
+    client = Requests(
+        f"127.0.0.1:{port}",
+        None,
+        schema="http",
+        pool_maxsize=args.pool,
+        pool_block=True,
+        cache=MemoryCache(),
+        retry=RetryPolicy(),
+        metrics=HistogramAggregator(),
+        coalesce=True
+    )
+    headers = dict(client.headers)
+
+    with client, ThreadPoolExecutor(max_workers=args.threads) as executor:
+        started = time.perf_counter()
+        futures = [executor.submit(worker, client, thread, args.calls) for thread in range(args.threads)]
+        mismatches = sum(future.result() for future in futures)
+        elapsed = time.perf_counter() - started
+
+    total = args.threads * args.calls
+    print(f"{args.threads} threads x {args.calls} calls on one instance, pool of {args.pool}")
+    print(f"  {total / elapsed:10.0f} req/s {elapsed:8.2f} s {accepted[0]:6d} sockets {mismatches:6d} mismatches")
+    assert mismatches == 0, "responses were mixed up between threads"
+    assert dict(client.headers) == headers, "the instance headers were modified"
+    assert "X-Call" not in client.session.headers, "per-call headers leaked into the session"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Benchmark suite of the request pipeline, run against the local stand-in server (``mockserver.py``).
+
+Every combination of method helper, payload size, ``search_keys`` (with / without), scheme (HTTP,
+or HTTPS with a self-signed certificate) and concurrency (serial, threads sharing one client,
+processes with a client each) is a case. ``GET`` and ``DELETE`` download the payload, ``POST``,
+``PUT`` and ``PATCH`` upload it and ``HEAD`` only receives headers.
+
+Each case runs in a fresh interpreter, so the peak RSS it reports is its own, and measures
+requests/sec, p50 / p99 / mean latency, peak RSS (of the case and of its worker processes) and
+the peak memory allocated by one call (``tracemalloc``, over a few extra serial calls since
+tracing slows them down). Results are written as JSON, compare two runs with
+``benchmarks/compare.py``.
+
+Payloads up to ``500m`` are supported, but downloading those needs several GB of memory once
+decoded, so the default sizes stop at ``1m``.
+
+Usage: ``python benchmarks/suite.py [--output results.json] [--methods get,post] [--sizes 100,10k,1m]
+[--schemes http,https] [--modes serial,threads,processes] [--calls 200]``
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import requests
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib3
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import Optional
+from mockserver import create_certificate, document, parse_size
+from requests_api import Requests
+from requests_api.version import version
+
+METHODS = ("get", "head", "post", "put", "patch", "delete")
+DOWNLOAD_METHODS = ("get", "delete")
+UPLOAD_METHODS = ("post", "put", "patch")
+MODES = ("serial", "threads", "processes")
+
+# call of the case being run, set by ``prepare`` in the case process and its workers
+call = None
+
+
+def prepare(case: dict) -> None:
+    """ builds the client of a case and the call measured """
+    global call
+    client = Requests(
+        f"127.0.0.1:{case['port']}",
+        None,
+        verify=case["cert"] or False,
+        schema=case["scheme"],
+        pool_maxsize=max(case["workers"], 10),
+        pool_block=True,
+        codec=case["codec"]
+    )
+    kwargs = {"search_keys": ["id"]} if case["search_keys"] else {}
+    if case["method"] in UPLOAD_METHODS:
+        kwargs["request_data"] = document(case["size"])
+    call = partial(getattr(client, case["method"]), f"/payload/{case['size']}", **kwargs)
+
+
+def timed_calls(count: int) -> list:
+    """ sends ``count`` calls, returns their latencies in seconds """
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def split(calls: int, workers: int) -> list:
+    """ shares ``calls`` between ``workers`` """
+    return [calls // workers + (index < calls % workers) for index in range(workers)]
+
+
+def percentile(latencies: list, q: float) -> float:
+    """ ``q`` percentile of sorted latencies """
+    return latencies[min(len(latencies) - 1, max(0, math.ceil(q * len(latencies)) - 1))]
+
+
+def peak_rss(who: int) -> int:
+    """ peak resident set size in bytes of ``resource.RUSAGE_SELF`` or ``RUSAGE_CHILDREN`` """
+    return resource.getrusage(who).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def run_case(case: dict) -> dict:
+    """ runs a case in this process, returns its measurements """
+    prepare(case)
+    timed_calls(case["warmup"])
+
+    if "serial" == case["mode"]:
+        started = time.perf_counter()
+        latencies = timed_calls(case["calls"])
+        elapsed = time.perf_counter() - started
+    else:
+        executor_type = ThreadPoolExecutor if "threads" == case["mode"] else ProcessPoolExecutor
+        options = {} if "threads" == case["mode"] else {"initializer": prepare, "initargs": (case,)}
+        with executor_type(max_workers=case["workers"], **options) as executor:
+            # workers are started (and warmed up) before the clock starts
+            list(executor.map(timed_calls, [case["warmup"]] * case["workers"]))
+            started = time.perf_counter()
+            latencies = [
+                latency
+                for worker in executor.map(timed_calls, split(case["calls"], case["workers"]))
+                for latency in worker
+            ]
+            elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    allocations = []
+    for _ in range(case["traced_calls"]):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        call()
+        allocations.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "mb_per_s": len(latencies) * case["size"] / elapsed / 1024 ** 2 if "head" != case["method"] else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "peak_rss_bytes": peak_rss(resource.RUSAGE_SELF),
+        "peak_rss_workers_bytes": peak_rss(resource.RUSAGE_CHILDREN),
+        "alloc_peak_bytes": max(allocations) if allocations else 0
+    }
+
+
+def system() -> dict:
+    """ describes the machine and versions the results were measured with """
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "requests_api": version,
+        "requests": requests.__version__,
+        "urllib3": urllib3.__version__,
+        "commit": commit.stdout.strip() or None
+    }
+
+
+def start_server(cert: Optional[str] = None, key: Optional[str] = None) -> tuple:
+    """ starts the stand-in server in its own process, returns ``(process, port)`` """
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mockserver.py")]
+    if cert is not None:
+        command += ["--tls", cert, key]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    return process, int(process.stdout.readline())
+
+
+def build_cases(args: argparse.Namespace) -> list:
+    """ expands the command line options into the list of cases """
+    cases = []
+    for scheme in args.schemes.split(","):
+        for method in args.methods.split(","):
+            for size in args.sizes.split(","):
+                for search_keys in (False, True):
+                    # only the downloaded payloads have something to search
+                    if search_keys and (args.no_search_keys or method not in DOWNLOAD_METHODS):
+                        continue
+                    for mode in args.modes.split(","):
+                        nbytes = parse_size(size)
+                        cases.append({
+                            "key": f"{method} {scheme} {size} {'search' if search_keys else 'plain'} {mode}",
+                            "method": method,
+                            "scheme": scheme,
+                            "size": nbytes,
+                            "search_keys": search_keys,
+                            "mode": mode,
+                            "workers": {"serial": 1, "threads": args.threads, "processes": args.processes}[mode],
+                            "calls": max(args.min_calls, min(args.calls, parse_size(args.budget) // max(nbytes, 1))),
+                            "warmup": args.warmup,
+                            "traced_calls": args.traced_calls,
+                            "codec": args.codec
+                        })
+    return cases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--methods", default=",".join(METHODS))
+    parser.add_argument("--sizes", default="100,10k,1m")
+    parser.add_argument("--schemes", default="http,https")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--calls", type=int, default=200, help="calls per case")
+    parser.add_argument("--min-calls", type=int, default=5, help="calls per case, whatever the budget")
+    parser.add_argument("--budget", default="256m", help="bytes transferred per case, caps the calls")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed calls per worker")
+    parser.add_argument("--traced-calls", type=int, default=3, help="calls traced with tracemalloc")
+    parser.add_argument("--codec", default="json")
+    parser.add_argument("--no-search-keys", action="store_true", help="skip the search_keys cases")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # a single case, run by the suite in a fresh interpreter
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case))))
+        return
+
+    cases = build_cases(args)
+    servers = []
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            endpoints = {}
+            for scheme in set(args.schemes.split(",")):
+                cert, key = create_certificate(directory) if "https" == scheme else (None, None)
+                process, port = start_server(cert, key)
+                servers.append(process)
+                endpoints[scheme] = (port, cert)
+
+            print(f"{len(cases)} cases")
+            for case in cases:
+                case["port"], case["cert"] = endpoints[case["scheme"]]
+                completed = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--case", json.dumps(case)],
+                    capture_output=True,
+                    text=True
+                )
+                if completed.returncode:
+                    error = (completed.stderr.strip().splitlines() or [f"exit status {completed.returncode}"])[-1]
+                    result = {"key": case["key"], "case": case, "error": error}
+                    print(f"  {case['key']:<40} failed: {result['error']}")
+                else:
+                    result = {"key": case["key"], "case": case, **json.loads(completed.stdout.splitlines()[-1])}
+                    print(f"  {case['key']:<40} {result['rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+                          f"p99 {result['p99_ms']:8.2f} ms  rss {result['peak_rss_bytes'] / 1024 ** 2:7.1f} MB  "
+                          f"alloc {result['alloc_peak_bytes'] / 1024 ** 2:7.2f} MB")
+                results.append(result)
+        finally:
+            for process in servers:
+                process.terminate()
+                process.wait()
+
+    with open(args.output, "w") as output:
+        json.dump({"system": system(), "results": results}, output, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
 from __future__ import absolute_import
 
 from requests_api.core import Requests
-from requests_api.errors import RequestError, HTTPError
+from requests_api.aio import AsyncRequests
+from requests_api.lookup import KeyPath, compile_path
+from requests_api.cache import MemoryCache, FileCache
+from requests_api.retry import RetryPolicy
+from requests_api.ratelimit import RateLimiter, Limit
+from requests_api.breaker import CircuitBreaker
+from requests_api.hedge import HedgePolicy
+from requests_api.compression import Compression
+from requests_api.bulk import BatchResult
+from requests_api.prepared import PreparedEndpoint
+from requests_api.metrics import MetricsCollector, HistogramAggregator, RequestRecord
+from requests_api.pagination import LinkHeaderPagination, CursorPagination, OffsetPagination
+from requests_api.errors import RequestError, HTTPError, DeadlineExceeded, CircuitOpenError
 from requests_api.auth import (
     basic_auth,
     digest_auth,
@@ -12,8 +24,29 @@ from requests_api.auth import (
 
 __all__ = [
     "Requests",
+    "AsyncRequests",
     "RequestError",
     "HTTPError",
+    "DeadlineExceeded",
+    "CircuitOpenError",
+    "KeyPath",
+    "compile_path",
+    "MemoryCache",
+    "FileCache",
+    "RetryPolicy",
+    "RateLimiter",
+    "Limit",
+    "CircuitBreaker",
+    "HedgePolicy",
+    "Compression",
+    "BatchResult",
+    "PreparedEndpoint",
+    "MetricsCollector",
+    "HistogramAggregator",
+    "RequestRecord",
+    "LinkHeaderPagination",
+    "CursorPagination",
+    "OffsetPagination",
     "basic_auth",
     "digest_auth",
     "oauth2_auth",
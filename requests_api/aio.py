@@ -0,0 +1,309 @@
+import time
+
+from typing import NoReturn, Union, Optional, TextIO
+from requests import Request
+from requests.auth import AuthBase, HTTPDigestAuth
+from requests_api.constants import (
+    STATUS_CODES,
+    HEAD,
+    POST,
+    PUT,
+    PATCH,
+)
+from requests_api.core import DEFAULT_TIMEOUT, BaseRequests, remaining_timeout
+from requests_api.serializers import JSONCodec
+from requests_api.errors import RequestError, ConfigurationError, DeadlineExceeded
+from requests_api.transport import HANDSHAKE_AUTH_TYPES
+
+# ``httpx`` is only imported once an ``AsyncRequests`` client is created,
+# ``asyncio`` once it sends a request
+
+
+def to_httpx_auth(auth: Optional[AuthBase]):
+    """
+    Converts an auth object created by ``requests_api.auth`` into one usable by ``httpx``.
+
+    Basic and OAuth2 auth are applied as-is by signing each request, digest auth is mapped to
+    ``httpx.DigestAuth``. NTLM and Kerberos negotiate per connection and are not supported.
+
+    :param auth: Auth object returned by one of the ``requests_api.auth`` helpers.
+    :return: ``httpx`` auth object, or ``None`` for anonymous requests.
+    """
+    if auth is None:
+        return None
+    if isinstance(auth, HTTPDigestAuth):
+        import httpx
+        return httpx.DigestAuth(auth.username, auth.password)
+    if type(auth).__name__ in HANDSHAKE_AUTH_TYPES:
+        raise ConfigurationError(f"'{type(auth).__name__}' is not supported by AsyncRequests.")
+    return RequestsAuthAdapter(auth)
+
+
+def to_httpx_timeout(timeout: Optional[Union[float, tuple]]):
+    """ converts (connect, read) timeouts into ``httpx.Timeout``, writes and pool waits get the read timeout """
+    import httpx
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return httpx.Timeout(read, connect=connect)
+
+
+class RequestsAuthAdapter:
+    """ applies a stateless ``requests`` auth object to ``httpx`` requests """
+
+    def __init__(self, auth: AuthBase) -> NoReturn:
+        self.auth = auth
+
+    def __call__(self, request):
+        prepared = Request(request.method, str(request.url), headers=dict(request.headers)).prepare()
+        prepared = self.auth(prepared)
+        request.headers.update(prepared.headers)
+        return request
+
+
+class AsyncRequests(BaseRequests):
+
+    def __init__(
+        self,
+        baseurl: str,
+        auth: Optional[AuthBase],
+        verify: Optional[Union[bool, TextIO]] = False,
+        schema: Optional[str] = "https",
+        headers: Optional[dict] = None,
+        allow_redirects: Optional[bool] = False,
+        max_connections: Optional[int] = 1000,
+        max_keepalive_connections: Optional[int] = 100,
+        keep_alive: Optional[bool] = True,
+        codec: Optional[Union[str, JSONCodec]] = "json",
+        timeout: Optional[Union[float, tuple]] = DEFAULT_TIMEOUT
+    ) -> NoReturn:
+        """ initialize class """
+        super().__init__(baseurl, auth, verify, schema, headers, allow_redirects, codec)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections if keep_alive else 0
+        self.client = self.create_client()
+
+    async def __aenter__(self) -> "AsyncRequests":
+        return self
+
+    async def __aexit__(self, *exc_info) -> NoReturn:
+        await self.aclose()
+
+    def create_client(self):
+        """ creates the non-blocking, connection-pooled client shared by every request """
+        try:
+            import httpx
+        except ImportError:
+            raise ConfigurationError("AsyncRequests requires 'httpx', install with 'requests-api[async]'.")
+        return httpx.AsyncClient(
+            auth=to_httpx_auth(self.auth),
+            verify=self.verify,
+            headers=self.headers,
+            timeout=to_httpx_timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections
+            )
+        )
+
+    async def aclose(self) -> NoReturn:
+        """ closes the client and all pooled connections """
+        await self.client.aclose()
+
+    async def get(
+        self,
+        path: str,
+        query_params: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ):
+        """ helper method for get request """
+        return await self.request(
+            method="GET",
+            path=path,
+            query_params=query_params,
+            search_keys=search_keys,
+            status_codes=status_codes,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
+        )
+
+    async def head(
+        self,
+        path: str,
+        query_params: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ):
+        """ helper method for head request """
+        return await self.request(
+            method="HEAD",
+            path=path,
+            query_params=query_params,
+            search_keys=search_keys,
+            status_codes=status_codes,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
+        )
+
+    async def post(
+        self,
+        path: str,
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ):
+        """ helper method for post request """
+        return await self.request(
+            method="POST",
+            path=path,
+            query_params=query_params,
+            request_data=request_data,
+            search_keys=search_keys,
+            status_codes=status_codes,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
+        )
+
+    async def put(
+        self,
+        path: str,
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ):
+        """ helper method for put request """
+        return await self.request(
+            method="PUT",
+            path=path,
+            query_params=query_params,
+            request_data=request_data,
+            search_keys=search_keys,
+            status_codes=status_codes,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
+        )
+
+    async def delete(
+        self,
+        path: str,
+        query_params: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ):
+        """ helper method for delete request """
+        return await self.request(
+            method="DELETE",
+            path=path,
+            query_params=query_params,
+            search_keys=search_keys,
+            status_codes=status_codes,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
+        )
+
+    async def patch(
+        self,
+        path: str,
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ):
+        """ helper method for patch request """
+        return await self.request(
+            method="PATCH",
+            path=path,
+            query_params=query_params,
+            request_data=request_data,
+            search_keys=search_keys,
+            status_codes=status_codes,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
+        )
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ) -> Union[bool, str]:
+        """
+        submits http request, ``timeout`` overrides the (connect, read) timeouts of the instance,
+        ``deadline`` caps the seconds the whole call may take (redirects and auth handshakes included),
+        ``headers`` override the instance headers for this call only
+        """
+        import asyncio
+        import httpx
+
+        http_method = method.upper()
+        if http_method not in STATUS_CODES:
+            raise RequestError(f"HTTP method type '{http_method}' is not supported.")
+
+        encoded_url = self.encode_url(path, query_params)
+        content = None
+        if http_method in (POST, PUT, PATCH):
+            content = self.codec.dumps({} if request_data is None else request_data)
+
+        timeout = self.timeout if timeout is None else timeout
+        expires = time.monotonic() + deadline if deadline is not None else None
+        if expires is not None:
+            timeout = remaining_timeout(timeout, expires)
+        try:
+            # redirects are followed except for HEAD, as ``Session.get`` / ``Session.head`` do
+            sending = self.client.request(
+                http_method, encoded_url, content=content, headers=headers, timeout=to_httpx_timeout(timeout),
+                follow_redirects=HEAD != http_method
+            )
+            if expires is None:
+                response = await sending
+            else:
+                response = await asyncio.wait_for(sending, expires - time.monotonic())
+
+            # raise exception for error codes 4xx or 5xx, ``httpx`` raising for 3xx as well
+            if response.is_error:
+                response.raise_for_status()
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"Deadline of {deadline}s exceeded before the request completed.")
+        except httpx.HTTPStatusError as exception:
+            raise RequestError(exception, exception.response.status_code)
+        except httpx.HTTPError as exception:
+            # a timeout cut short by the deadline is reported as such
+            if expires is not None and time.monotonic() >= expires:
+                raise DeadlineExceeded(f"Deadline exceeded: {exception}")
+            # connection failures and timeouts never produce a response
+            raise RequestError(exception, 0)
+
+        self.validate_status_code(http_method, response.status_code, response.reason_phrase, status_codes)
+        return self.decode_response(response, search_keys)
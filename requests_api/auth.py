@@ -1,9 +1,21 @@
+from typing import TYPE_CHECKING
 from requests.auth import HTTPBasicAuth
 from requests.auth import HTTPDigestAuth
-from requests_oauthlib import OAuth2
-from requests_ntlm3 import HttpNtlmAuth
-from requests_ntlm3 import NtlmCompatibility
-from requests_kerberos import HTTPKerberosAuth, REQUIRED
+from requests_api.errors import ConfigurationError
+
+# the OAuth2, NTLM and Kerberos backends are optional and only
+# imported once their helper is called
+if TYPE_CHECKING:
+    from requests_oauthlib import OAuth2
+    from requests_ntlm3 import HttpNtlmAuth
+    from requests_kerberos import HTTPKerberosAuth
+
+
+# ``requests_ntlm3.NtlmCompatibility.NTLMv2_DEFAULT``
+NTLMV2_DEFAULT = 3
+
+# ``requests_kerberos.REQUIRED``
+REQUIRED = 1
 
 
 def basic_auth(username: str, password: str) -> HTTPBasicAuth:
@@ -28,7 +40,7 @@ def digest_auth(username: str, password: str) -> HTTPDigestAuth:
     return HTTPDigestAuth(username, password)
 
 
-def oauth2_auth(client_id: int, token: dict) -> OAuth2:
+def oauth2_auth(client_id: int, token: dict) -> "OAuth2":
     """
     Creates an ``OAuth2`` object to provide the ``.RequestsAPI`` object for authentication.
 
@@ -36,6 +48,10 @@ def oauth2_auth(client_id: int, token: dict) -> OAuth2:
     :param token: Token dictionary, must include access_token and token_type
     :return: ``OAuth2`` object.
     """
+    try:
+        from requests_oauthlib import OAuth2
+    except ImportError:
+        raise ConfigurationError("OAuth2 auth requires 'requests-oauthlib', install with 'requests-api[oauth]'.")
     return OAuth2(client_id, None, token)
 
 
@@ -43,8 +59,8 @@ def ntlm_auth(
     username: str,
     password: str,
     send_cbt: bool = False,
-    ntlm_compatibility: int = NtlmCompatibility.NTLMv2_DEFAULT
-) -> HttpNtlmAuth:
+    ntlm_compatibility: int = NTLMV2_DEFAULT
+) -> "HttpNtlmAuth":
     """
     Creates an ``HttpNtlmAuth`` object to provide the ``.RequestsAPI`` object for authentication.
 
@@ -54,6 +70,10 @@ def ntlm_auth(
     :param ntlm_compatibility: Compatibility level for auth message
     :return: ``HttpNtlmAuth`` object.
     """
+    try:
+        from requests_ntlm3 import HttpNtlmAuth
+    except ImportError:
+        raise ConfigurationError("NTLM auth requires 'requests-ntlm3', install with 'requests-api[ntlm]'.")
     return HttpNtlmAuth(username, password, send_cbt, ntlm_compatibility)
 
 
@@ -66,7 +86,7 @@ def kerberos_auth(
     hostname_override: str = None,
     sanitize_mutual_error_response: bool = True,
     send_cbt: bool = True
-) -> HTTPKerberosAuth:
+) -> "HTTPKerberosAuth":
     """
     Creates a ``HTTPKerberosAuth`` object to provide the ``.RequestsAPI`` object for authentication.
 
@@ -80,6 +100,10 @@ def kerberos_auth(
     :param hostname_override: Override hostname
     :return: ``HTTPKerberosAuth`` object.
     """
+    try:
+        from requests_kerberos import HTTPKerberosAuth
+    except ImportError:
+        raise ConfigurationError("Kerberos auth requires 'requests-kerberos', install with 'requests-api[kerberos]'.")
     return HTTPKerberosAuth(
         mutual_authentication,
         service,
@@ -0,0 +1,183 @@
+import time
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, NoReturn, Optional, Union
+from requests_api.errors import RequestError, DeadlineExceeded
+
+
+# positional order of the fields accepted in a tuple request spec
+SPEC_FIELDS = ("method", "path", "query_params", "request_data")
+
+# client the requests of a worker process are sent with, set by ``init_worker``
+worker_client = None
+
+
+def normalize_spec(spec: Union[tuple, list, dict]) -> dict:
+    """
+    Converts a batch request spec into keyword arguments for ``Requests.request``.
+
+    :param spec: Either a ``(method, path, query_params, request_data)`` tuple (trailing fields
+        may be omitted) or a dictionary of ``Requests.request`` keyword arguments.
+    :return: Keyword arguments for ``Requests.request``.
+    """
+    if isinstance(spec, dict):
+        return dict(spec)
+    if not isinstance(spec, (tuple, list)) or not 2 <= len(spec) <= len(SPEC_FIELDS):
+        raise RequestError(f"Invalid batch request spec '{spec}', expected (method, path, "
+                           f"query_params, request_data).")
+    return dict(zip(SPEC_FIELDS, spec))
+
+
+def as_error(exception: Exception) -> RequestError:
+    """ returns the failure of a batch item as ``RequestError``, wrapping any other exception """
+    if isinstance(exception, RequestError):
+        return exception
+    error = RequestError(f"{type(exception).__name__}: {exception}")
+    error.__cause__ = exception
+    return error
+
+
+def prepare_calls(specs: Iterable[Union[tuple, list, dict]]) -> list:
+    """ normalizes every spec on its own, an invalid one becomes the ``RequestError`` result of its item """
+    calls = []
+    for spec in specs:
+        try:
+            calls.append(normalize_spec(spec))
+        except Exception as exception:
+            calls.append(as_error(exception))
+    return calls
+
+
+def collect(futures: list, deadline: Optional[float] = None) -> list:
+    """ results of the futures of a batch, failures and unfinished items as ``RequestError`` """
+    results = []
+    for future in futures:
+        if isinstance(future, RequestError):
+            results.append(future)
+        elif not future.done() or future.cancelled():
+            results.append(DeadlineExceeded(f"Batch deadline of {deadline}s exceeded before the request completed."))
+        else:
+            try:
+                results.append(future.result())
+            except Exception as exception:
+                results.append(as_error(exception))
+    return results
+
+
+def call(func: Callable, kwargs: dict, expires: Optional[float] = None):
+    """ runs a single batch item, returning its failure as a ``RequestError`` value """
+
+    # items inherit whatever is left of the batch deadline
+    if expires is not None and kwargs.get("deadline") is None:
+        kwargs["deadline"] = expires - time.monotonic()
+    try:
+        return func(**kwargs)
+    except Exception as exception:
+        return as_error(exception)
+
+
+def run_batch(
+    func: Callable,
+    specs: Iterable[Union[tuple, list, dict]],
+    max_workers: int,
+    deadline: Optional[float] = None
+) -> list:
+    """
+    Runs ``func`` for every request spec on a bounded thread pool.
+
+    :param func: Callable accepting ``Requests.request`` keyword arguments.
+    :param specs: Request specs, see ``normalize_spec``.
+    :param max_workers: Maximum number of requests in flight at once.
+    :param deadline: Seconds the whole batch may take, unfinished items become ``RequestError``.
+    :return: Results in input order, failed items (invalid specs included) are returned as ``RequestError``.
+    """
+    calls = prepare_calls(specs)
+    if not calls:
+        return []
+
+    expires = time.monotonic() + deadline if deadline is not None else None
+    futures = []
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls))))
+    try:
+        # invalid specs stand in for their future
+        futures.extend(
+            kwargs if isinstance(kwargs, RequestError) else executor.submit(call, func, kwargs, expires)
+            for kwargs in calls
+        )
+        wait([future for future in futures if not isinstance(future, RequestError)], timeout=deadline)
+    finally:
+        # never block on stragglers once the deadline has passed
+        for future in futures:
+            if not isinstance(future, RequestError):
+                future.cancel()
+        executor.shutdown(wait=False)
+
+    return collect(futures, deadline)
+
+
+def init_worker(client: Any) -> NoReturn:
+    """ initializer of the worker processes, keeps the client their requests are sent with """
+    global worker_client
+    worker_client = client
+
+
+def call_in_worker(kwargs: dict, expires_at: Optional[float] = None):
+    """ runs a single batch item in a worker process, ``expires_at`` being a ``time.time()`` timestamp """
+
+    # monotonic clocks cannot be compared between processes
+    expires = None if expires_at is None else time.monotonic() + expires_at - time.time()
+    result = call(worker_client.request, kwargs, expires)
+
+    # the response and the ``requests`` exception stay in the worker,
+    # only the description of the failure is sent back
+    if isinstance(result, RequestError):
+        return type(result)(str(result.message), result.http_errno)
+    return result
+
+
+def run_process_batch(
+    client: Any,
+    specs: Iterable[Union[tuple, list, dict]],
+    max_workers: int,
+    deadline: Optional[float] = None,
+    mp_context: Optional[Any] = None
+) -> list:
+    """
+    Runs ``client.request`` for every request spec on a pool of worker processes.
+
+    :param client: Client the workers send the requests with, pickled unless the workers are forked.
+    :param specs: Request specs, see ``normalize_spec``.
+    :param max_workers: Number of worker processes.
+    :param deadline: Seconds the whole batch may take, unfinished items become ``RequestError``.
+    :param mp_context: ``multiprocessing`` context of the workers, the platform default when omitted.
+    :return: Results in input order, failed items (invalid specs included) are returned as ``RequestError``.
+    """
+    calls = [
+        RequestError("Streamed responses cannot be sent back from worker processes.")
+        if isinstance(kwargs, dict) and kwargs.get("stream") else kwargs
+        for kwargs in prepare_calls(specs)
+    ]
+    if not calls:
+        return []
+
+    expires_at = time.time() + deadline if deadline is not None else None
+    futures = []
+    executor = ProcessPoolExecutor(
+        max_workers=max(1, min(max_workers, len(calls))),
+        mp_context=mp_context,
+        initializer=init_worker,
+        initargs=(client,)
+    )
+    try:
+        futures.extend(
+            kwargs if isinstance(kwargs, RequestError) else executor.submit(call_in_worker, kwargs, expires_at)
+            for kwargs in calls
+        )
+        wait([future for future in futures if not isinstance(future, RequestError)], timeout=deadline)
+    finally:
+        for future in futures:
+            if not isinstance(future, RequestError):
+                future.cancel()
+        executor.shutdown(wait=False)
+
+    return collect(futures, deadline)
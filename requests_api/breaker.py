@@ -0,0 +1,191 @@
+import threading
+import time
+
+from collections import deque
+from typing import Callable, NoReturn, Optional
+from requests_api.errors import CircuitOpenError, RequestError
+
+
+# circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# status codes counted as failures of the upstream, 4xx are failures of the caller
+FAILURE_STATUS_CODES = (500, 502, 503, 504)
+
+
+class Circuit:
+    """ state of the circuit of one host """
+
+    def __init__(self, window: int) -> NoReturn:
+        """ initialize class """
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.opened = 0.0
+        self.trials = 0
+        self.lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker, safe to share between threads and clients.
+
+    The outcome (failed, slow) of the last ``window`` calls to a host is recorded. Once at least
+    ``min_calls`` were recorded and the share of failed or slow calls reaches its threshold, the
+    circuit opens and calls fail immediately with ``CircuitOpenError``. After ``open_seconds`` the
+    circuit is half-open: ``half_open_calls`` trial calls are let through, closing the circuit if
+    they all succeed and opening it again as soon as one fails.
+
+    Connection errors, timeouts and ``failure_status_codes`` count as failures.
+
+    :param failure_rate: Share of failed calls opening the circuit.
+    :param slow_call_duration: Seconds until the response headers past which a call is slow,
+        ``None`` to ignore durations.
+    :param slow_call_rate: Share of slow calls opening the circuit.
+    :param window: Number of calls the rates are measured over.
+    :param min_calls: Calls recorded before the rates are evaluated.
+    :param open_seconds: Seconds the circuit stays open before trial calls are let through.
+    :param half_open_calls: Trial calls let through while half-open.
+    :param failure_status_codes: Status codes counted as failures.
+    :param on_state_change: Called with ``(host, previous state, new state)`` on every transition.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        slow_call_duration: Optional[float] = None,
+        slow_call_rate: float = 1.0,
+        window: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1,
+        failure_status_codes: tuple = FAILURE_STATUS_CODES,
+        on_state_change: Optional[Callable[[str, str, str], None]] = None
+    ) -> NoReturn:
+        """ initialize class """
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.failure_status_codes = tuple(failure_status_codes)
+        self.on_state_change = on_state_change
+        self.circuits = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state["circuits"], state["lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> NoReturn:
+        self.__dict__.update(state)
+        self.circuits = {}
+        self.lock = threading.Lock()
+
+    def after_fork(self) -> NoReturn:
+        """ keeps the state of the circuits in the child process, with new locks and no trial calls in flight """
+        self.lock = threading.Lock()
+        for circuit in self.circuits.values():
+            circuit.lock = threading.Lock()
+            circuit.trials = 0
+
+    def circuit(self, host: str) -> Circuit:
+        """ returns the circuit of ``host`` """
+        circuit = self.circuits.get(host)
+        if circuit is None:
+            with self.lock:
+                circuit = self.circuits.setdefault(host, Circuit(self.window))
+        return circuit
+
+    def state(self, host: str) -> str:
+        """ current state of the circuit of ``host`` """
+        return self.circuit(host).state
+
+    def snapshot(self) -> dict:
+        """ returns the state, recorded calls and failure / slow call rates of every host """
+        snapshot = {}
+        for host, circuit in list(self.circuits.items()):
+            with circuit.lock:
+                outcomes = list(circuit.outcomes)
+                state = circuit.state
+            snapshot[host] = {
+                "state": state,
+                "calls": len(outcomes),
+                "failure_rate": sum(failed for failed, _ in outcomes) / len(outcomes) if outcomes else 0.0,
+                "slow_call_rate": sum(slow for _, slow in outcomes) / len(outcomes) if outcomes else 0.0
+            }
+        return snapshot
+
+    def is_failure(self, error: RequestError) -> bool:
+        """ whether a failed call counts against the upstream """
+        return not error.http_errno or error.http_errno in self.failure_status_codes
+
+    def acquire(self, host: str) -> NoReturn:
+        """ lets a call to ``host`` through, raises ``CircuitOpenError`` while the circuit is open """
+        circuit = self.circuit(host)
+        with circuit.lock:
+            previous = circuit.state
+            if OPEN == circuit.state:
+                if time.monotonic() - circuit.opened < self.open_seconds:
+                    raise CircuitOpenError(f"Circuit of '{host}' is open, failing fast.")
+                circuit.state, circuit.trials = HALF_OPEN, 0
+            if HALF_OPEN == circuit.state:
+                if circuit.trials >= self.half_open_calls:
+                    raise CircuitOpenError(f"Circuit of '{host}' is half-open, trial calls in flight.")
+                circuit.trials += 1
+            state = circuit.state
+        self.notify(host, previous, state)
+
+    def release(self, host: str, failed: Optional[bool], duration: float) -> NoReturn:
+        """
+        Records the outcome of a call let through by ``acquire``.
+
+        :param host: Host the call was sent to.
+        :param failed: Whether the call failed, ``None`` if it ended before reaching the host.
+        :param duration: Seconds until the response headers arrived.
+        """
+        slow = self.slow_call_duration is not None and duration >= self.slow_call_duration
+        circuit = self.circuit(host)
+        with circuit.lock:
+            previous = circuit.state
+            if HALF_OPEN == circuit.state:
+                circuit.trials -= 1
+                if failed or slow:
+                    self.trip(circuit)
+                elif failed is not None:
+                    circuit.outcomes.append((False, False))
+                    if len(circuit.outcomes) >= self.half_open_calls and not circuit.trials:
+                        circuit.state = CLOSED
+                        circuit.outcomes.clear()
+            elif failed is not None:
+                circuit.outcomes.append((failed, slow))
+                if CLOSED == circuit.state and self.over_threshold(circuit):
+                    self.trip(circuit)
+            state = circuit.state
+        self.notify(host, previous, state)
+
+    def over_threshold(self, circuit: Circuit) -> bool:
+        """ whether the recorded failure or slow call rate warrants opening the circuit """
+        calls = len(circuit.outcomes)
+        if calls < self.min_calls:
+            return False
+        failures = sum(failed for failed, _ in circuit.outcomes)
+        slow = sum(slow for _, slow in circuit.outcomes)
+        return failures >= calls * self.failure_rate or (
+            self.slow_call_duration is not None and slow >= calls * self.slow_call_rate
+        )
+
+    def trip(self, circuit: Circuit) -> NoReturn:
+        """ opens a circuit, must be called holding its lock """
+        circuit.state = OPEN
+        circuit.opened = time.monotonic()
+        circuit.outcomes.clear()
+
+    def notify(self, host: str, previous: str, state: str) -> NoReturn:
+        """ calls the ``on_state_change`` hook on transitions """
+        if previous != state and self.on_state_change is not None:
+            self.on_state_change(host, previous, state)
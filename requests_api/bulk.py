@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Iterable, Iterator, NoReturn, Optional
+from requests_api.serializers import JSONCodec
+
+
+# bytes of NDJSON lines gathered into each chunk of a streamed body
+CHUNK_BYTES = 64 * 1024
+
+
+class BatchResult:
+    """
+    Outcome of one batch of a bulk upload.
+
+    :param index: Position of the batch in the upload.
+    :param first: Position of the first record of the batch among all records.
+    :param records: Number of records in the batch.
+    :param size: Size of the batch body in bytes.
+    """
+    __slots__ = ("index", "first", "records", "size", "status_code", "result", "error")
+
+    def __init__(self, index: int, first: int, records: int, size: int) -> NoReturn:
+        """ initialize class """
+        self.index = index
+        self.first = first
+        self.records = records
+        self.size = size
+        self.status_code = 0
+        self.result = None
+        self.error = None
+
+    @property
+    def ok(self) -> bool:
+        """ whether the batch was accepted with an expected status code """
+        return self.error is None
+
+    def __repr__(self) -> str:
+        return (f"BatchResult(index={self.index} records={self.first}..{self.first + self.records - 1} "
+                f"status_code={self.status_code} error={self.error})")
+
+
+def encode_lines(records: Iterable[Any], codec: JSONCodec) -> Iterator[bytes]:
+    """ encodes every record as one NDJSON line """
+    for record in records:
+        yield codec.dumps(record) + b"\n"
+
+
+def iter_batches(lines: Iterator[bytes], batch_size: Optional[int], batch_bytes: Optional[int]) -> Iterator[tuple]:
+    """
+    Groups NDJSON lines into batch bodies.
+
+    A batch is closed once it holds ``batch_size`` records or adding the next record would exceed
+    ``batch_bytes``; a record larger than ``batch_bytes`` is sent in a batch of its own.
+
+    :param lines: Encoded lines.
+    :param batch_size: Maximum number of records per batch, ``None`` for no limit.
+    :param batch_bytes: Maximum size in bytes of a batch body, ``None`` for no limit.
+    :return: Iterator of ``(records, body)``.
+    """
+    batch, size = [], 0
+    for line in lines:
+        if batch and batch_bytes is not None and size + len(line) > batch_bytes:
+            yield len(batch), b"".join(batch)
+            batch, size = [], 0
+        batch.append(line)
+        size += len(line)
+        if batch_size is not None and len(batch) >= batch_size:
+            yield len(batch), b"".join(batch)
+            batch, size = [], 0
+    if batch:
+        yield len(batch), b"".join(batch)
+
+
+def iter_chunks(lines: Iterator[bytes], counter: BatchResult, chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """ gathers NDJSON lines into chunks of a streamed body, counting the records and bytes into ``counter`` """
+    chunk, size = [], 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        counter.records += 1
+        counter.size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+def run_bulk(
+    send: Callable[[bytes, BatchResult], NoReturn],
+    batches: Iterator[tuple],
+    max_in_flight: int
+) -> list:
+    """
+    Sends batches on a thread pool, encoding the next batch only once one is free.
+
+    At most ``max_in_flight`` batch bodies are held in memory, whatever the number of records.
+
+    :param send: Sends a batch body, filling in the ``BatchResult`` of the batch.
+    :param batches: ``(records, body)`` tuples, see ``iter_batches``.
+    :param max_in_flight: Maximum number of batches sent at once.
+    :return: ``BatchResult`` of every batch, in upload order.
+    """
+    results = []
+    in_flight = set()
+    first = 0
+    batches = iter(batches)
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+        while True:
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+
+                # re-raises errors other than ``RequestError``, which are results
+                for future in done:
+                    future.result()
+            batch = next(batches, None)
+            if batch is None:
+                break
+            records, body = batch
+            result = BatchResult(len(results), first, records, len(body))
+            results.append(result)
+            in_flight.add(executor.submit(send, body, result))
+            first += records
+        for future in in_flight:
+            future.result()
+    return results
@@ -0,0 +1,393 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import closing, suppress
+from email.utils import parsedate_to_datetime
+from typing import Any, NoReturn, Optional, Union
+from requests import PreparedRequest, Response
+from requests_api.lookup import lookup
+from requests_api.serializers import JSONCodec, get_codec
+
+
+def auth_identity(auth: Any, http_method: str, encoded_url: str) -> Optional[tuple]:
+    """
+    Works out who an auth object authenticates requests as, to tell the responses of its users apart.
+
+    Credentials (basic, digest, NTLM) and Kerberos principals are read from the auth object, other
+    schemes (OAuth2, tokens) are applied to a probe request and identified by the headers and URL
+    they set, so a refreshed token is a new identity.
+
+    :param auth: Auth object of the client.
+    :param http_method: Upper-cased HTTP method.
+    :param encoded_url: Output of ``encode_url``.
+    :return: Credential material, ``None`` when it cannot be worked out.
+    """
+    if isinstance(auth, tuple):
+        return ("tuple",) + auth
+    name = type(auth).__name__
+    if hasattr(auth, "username") and hasattr(auth, "password"):
+        return name, auth.username, auth.password
+    if hasattr(auth, "principal"):
+        # without a principal, the default credentials of the process are used
+        return (name, auth.principal) if auth.principal else None
+
+    probe = PreparedRequest()
+    probe.prepare(method=http_method, url=encoded_url)
+    before = dict(probe.headers)
+    try:
+        probe = auth(probe) or probe
+    except Exception:
+        return None
+    added = sorted((key, value) for key, value in probe.headers.items() if before.get(key) != value)
+    if not added and probe.url == encoded_url:
+        return None
+    return name, probe.url, added
+
+
+def cache_key(http_method: str, encoded_url: str, headers: dict, auth: Any = None) -> Optional[str]:
+    """
+    Builds the cache key of a request.
+
+    The configured headers and the credentials of the auth object are part of the key, so a cache
+    shared by several clients never serves one user's response to another. Requests whose
+    credentials cannot be worked out are not cached.
+
+    :param http_method: Upper-cased HTTP method.
+    :param encoded_url: Output of ``encode_url``.
+    :param headers: Headers sent with every request.
+    :param auth: Auth object of the client.
+    :return: Hex digest identifying the request, ``None`` when it must not be cached.
+    """
+    identity = None
+    if auth is not None:
+        identity = auth_identity(auth, http_method, encoded_url)
+        if identity is None:
+            return None
+    material = repr((http_method, encoded_url, sorted((headers or {}).items()), identity))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def parse_cache_control(value: Optional[str]) -> dict:
+    """ parses a ``Cache-Control`` header into a dictionary of (lower-cased) directives """
+    directives = {}
+    for directive in (value or "").split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def expires_at(headers: dict, now: Optional[float] = None) -> Optional[float]:
+    """
+    Computes until when a response is fresh from its ``Cache-Control`` / ``Expires`` headers.
+
+    :param headers: Response headers.
+    :param now: Current timestamp.
+    :return: Expiry timestamp (``0`` means revalidate on every use), ``None`` if it must not be stored.
+    """
+    now = time.time() if now is None else now
+    directives = parse_cache_control(headers.get("Cache-Control"))
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    with suppress(KeyError, TypeError, ValueError):
+        return now + max(0, int(directives["max-age"]))
+    with suppress(KeyError, TypeError, ValueError, IndexError, OverflowError):
+        return parsedate_to_datetime(headers["Expires"]).timestamp()
+    return 0
+
+
+class CacheEntry:
+    """ cached response, holding the decoded body and the results of each set of search keys """
+
+    def __init__(
+        self,
+        content: bool,
+        is_json: bool,
+        body: Any,
+        size: int,
+        expires: float,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> NoReturn:
+        """ initialize class """
+        self.content = content
+        self.is_json = is_json
+        self.body = body
+        self.size = size
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+        self.lookups = {}
+
+    @classmethod
+    def from_response(cls, response: Response, codec: JSONCodec) -> Optional["CacheEntry"]:
+        """ creates an entry from a ``200`` response, ``None`` if the response may not be cached """
+        expires = expires_at(response.headers)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        # without a lifetime or a validator the entry would never be usable
+        if expires is None or (not expires and not etag and not last_modified):
+            return None
+
+        content = response.content
+        is_json, body = False, None
+        with suppress(*codec.decode_errors):
+            body, is_json = codec.loads(content), True
+        if not is_json:
+            body = response.text
+        return cls(bool(content), is_json, body, len(content), expires, etag, last_modified)
+
+    def is_fresh(self) -> bool:
+        """ whether the entry can be used without revalidating it """
+        return time.time() < self.expires
+
+    def validators(self) -> dict:
+        """ conditional request headers used to revalidate the entry """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def revalidate(self, response: Response) -> "CacheEntry":
+        """ refreshes the lifetime (and validators) of the entry from a ``304`` response """
+        expires = expires_at(response.headers)
+        self.expires = expires or 0
+        self.etag = response.headers.get("ETag", self.etag)
+        self.last_modified = response.headers.get("Last-Modified", self.last_modified)
+        return self
+
+    def result(self, search_keys: Optional[list] = None) -> Union[bool, str, dict, list]:
+        """ returns the cached body, or the cached results of ``search_keys`` """
+        if not self.content:
+            return True
+        if not self.is_json or not search_keys:
+            return self.body
+
+        keys = tuple(search_keys)
+        if keys not in self.lookups:
+            self.lookups[keys] = lookup(search_keys, self.body)
+        return self.lookups[keys]
+
+
+class BaseCache:
+    """ interface implemented by the cache backends """
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """ returns the entry stored under ``key`` and marks it as recently used """
+        raise NotImplementedError
+
+    def set(self, key: str, entry: CacheEntry) -> NoReturn:
+        """ stores ``entry``, evicting the least recently used entries when over capacity """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> NoReturn:
+        """ removes the entry stored under ``key`` """
+        raise NotImplementedError
+
+    def clear(self) -> NoReturn:
+        """ removes every entry """
+        raise NotImplementedError
+
+    def after_fork(self) -> NoReturn:
+        """ called in the child process after a fork, to replace locks held by threads of the parent """
+
+
+class MemoryCache(BaseCache):
+    """
+    In-process LRU cache bounded by number of entries and by total body size.
+
+    Cached bodies are shared between callers and must be treated as read-only.
+
+    :param max_entries: Maximum number of entries.
+    :param max_bytes: Maximum total size of the cached (encoded) bodies.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024) -> NoReturn:
+        """ initialize class """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> NoReturn:
+        self.__dict__.update(state)
+        self.after_fork()
+
+    def after_fork(self) -> NoReturn:
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> NoReturn:
+        if entry.size > self.max_bytes:
+            return self.delete(key)
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            self.entries[key] = entry
+            self.size += entry.size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def delete(self, key: str) -> NoReturn:
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry.size
+
+    def clear(self) -> NoReturn:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class FileCache(BaseCache):
+    """
+    On-disk LRU cache stored in a SQLite database, safe to share between threads and processes.
+
+    Entries are stored as plain columns, their body encoded with ``codec`` (or as UTF-8 text), so
+    reading the file never runs code that another writer of the file could have put in it.
+
+    :param path: Path of the database file, created if it does not exist.
+    :param max_entries: Maximum number of entries.
+    :param max_bytes: Maximum total size of the cached (encoded) bodies.
+    :param timeout: Seconds to wait for another process holding the database lock.
+    :param codec: JSON codec the decoded bodies are stored with, see ``get_codec``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        max_bytes: int = 512 * 1024 * 1024,
+        timeout: float = 30.0,
+        codec: Union[str, JSONCodec] = "json"
+    ) -> NoReturn:
+        """ initialize class """
+        self.path = os.path.abspath(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.codec = get_codec(codec)
+        with self.connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+
+            # earlier versions pickled the entries, they are dropped rather than ever unpickled
+            if connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entries'").fetchone():
+                connection.execute("DROP TABLE entries")
+                connection.execute("DROP TABLE IF EXISTS totals")
+
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, content INTEGER NOT NULL, is_json INTEGER NOT NULL, body BLOB, "
+                "size INTEGER NOT NULL, expires REAL NOT NULL, etag TEXT, last_modified TEXT, used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+
+            # running totals kept by triggers, so a write never scans the table to check the limits
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), "
+                "count INTEGER NOT NULL, size INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO totals SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN "
+                "UPDATE totals SET count = count + 1, size = size + new.size; END"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN "
+                "UPDATE totals SET count = count - 1, size = size - old.size; END"
+            )
+            connection.execute("COMMIT")
+
+    def connect(self) -> closing:
+        """ opens a new connection, connections are never shared between threads or processes """
+        return closing(sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None))
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT content, is_json, body, size, expires, etag, last_modified FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE responses SET used = ? WHERE key = ?", (time.time(), key))
+
+        content, is_json, body, size, expires, etag, last_modified = row
+        if not content:
+            body = None
+        elif is_json:
+            body = self.codec.loads(body)
+        else:
+            body = body.decode("utf-8")
+        return CacheEntry(bool(content), bool(is_json), body, size, expires, etag, last_modified)
+
+    def set(self, key: str, entry: CacheEntry) -> NoReturn:
+        if entry.size > self.max_bytes:
+            return self.delete(key)
+        if not entry.content:
+            body = None
+        elif entry.is_json:
+            body = self.codec.dumps(entry.body)
+        else:
+            body = entry.body.encode("utf-8")
+
+        with self.connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            # replaced rows are deleted first, ``INSERT OR REPLACE`` would not fire the delete trigger
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            connection.execute(
+                "INSERT INTO responses (key, content, is_json, body, size, expires, etag, last_modified, used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.content, entry.is_json, body, entry.size, entry.expires, entry.etag,
+                 entry.last_modified, time.time())
+            )
+            count, size = connection.execute("SELECT count, size FROM totals").fetchone()
+            if count > self.max_entries or size > self.max_bytes:
+                # the least recently used entries are read from the index until the limits are met
+                evicted = []
+                with closing(connection.execute("SELECT key, size FROM responses ORDER BY used")) as cursor:
+                    for evicted_key, evicted_size in cursor:
+                        if count <= self.max_entries and size <= self.max_bytes:
+                            break
+                        evicted.append((evicted_key,))
+                        count, size = count - 1, size - evicted_size
+                connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+            connection.execute("COMMIT")
+
+    def delete(self, key: str) -> NoReturn:
+        with self.connect() as connection:
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> NoReturn:
+        with self.connect() as connection:
+            connection.execute("DELETE FROM responses")
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from typing import Any, Callable, Hashable, NoReturn, Optional
+from requests_api.errors import DeadlineExceeded
+
+
+class Flight:
+    """ call in progress, shared by every caller with the same key """
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> NoReturn:
+        """ initialize class """
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time (single-flight).
+
+    The first caller of a key runs the call, callers arriving while it is in flight wait for it and
+    receive the same result or exception. The key is released once the call returns, so later callers
+    run it again.
+    """
+
+    def __init__(self) -> NoReturn:
+        """ initialize class """
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {}
+
+    def __setstate__(self, state: dict) -> NoReturn:
+        self.after_fork()
+
+    def after_fork(self) -> NoReturn:
+        """ forgets the calls in flight in the parent process, their leaders do not exist in the child """
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Any],
+        expires: Optional[float] = None,
+        on_join: Optional[Callable[[], Any]] = None
+    ) -> tuple:
+        """
+        Runs ``func``, or waits for the call already in flight for ``key``.
+
+        :param key: Identity of the call.
+        :param func: Call to run when none is in flight.
+        :param expires: ``time.monotonic()`` after which a waiting caller gives up.
+        :param on_join: Called when the caller joins a call already in flight.
+        :return: ``(result, shared)``, ``shared`` being ``True`` for callers that waited.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+
+        if leader:
+            try:
+                flight.result = func()
+            except Exception as error:
+                flight.error = error
+                raise
+            finally:
+                with self.lock:
+                    del self.flights[key]
+                flight.done.set()
+            return flight.result, False
+
+        if on_join is not None:
+            on_join()
+        timeout = None if expires is None else max(0.0, expires - time.monotonic())
+        if not flight.done.wait(timeout):
+            raise DeadlineExceeded("Deadline exceeded while waiting for a coalesced request.")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result, True
@@ -0,0 +1,93 @@
+import gzip
+import zlib
+
+from typing import NoReturn, Optional
+from urllib3.util.request import ACCEPT_ENCODING
+from requests_api.errors import ConfigurationError
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# content codings in order of preference, best compression ratio first
+PREFERRED_ENCODINGS = ("zstd", "br", "gzip", "deflate")
+
+
+def available_encodings() -> tuple:
+    """ content codings request bodies can be compressed with, in order of preference """
+    encodings = {"gzip": True, "deflate": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return tuple(encoding for encoding in PREFERRED_ENCODINGS if encodings[encoding])
+
+
+def accept_encoding() -> str:
+    """
+    Builds the ``Accept-Encoding`` header of every request.
+
+    Only the codings ``urllib3`` decodes while the body is read are advertised, so ``br`` and
+    ``zstd`` are negotiated once ``brotli`` / ``zstandard`` are installed.
+
+    :return: Header value, preferred codings first.
+    """
+    decodable = {encoding.strip() for encoding in ACCEPT_ENCODING.split(",")}
+    return ", ".join(encoding for encoding in PREFERRED_ENCODINGS if encoding in decodable)
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compresses a request body.
+
+    :param data: Encoded body.
+    :param encoding: Content coding, one of ``available_encodings()``.
+    :param level: Compression level, the library default when omitted.
+    :return: Compressed body.
+    """
+    if "gzip" == encoding:
+        return gzip.compress(data, 6 if level is None else level)
+    if "deflate" == encoding:
+        return zlib.compress(data, -1 if level is None else level)
+    if "br" == encoding:
+        return brotli.compress(data) if level is None else brotli.compress(data, quality=level)
+    if "zstd" == encoding:
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    raise ConfigurationError(f"Content coding '{encoding}' is not supported.")
+
+
+class Compression:
+    """
+    Compresses request bodies larger than ``threshold`` bytes.
+
+    Small bodies are sent as-is, since compressing them costs more CPU than the bytes it saves.
+    The server must accept the chosen ``Content-Encoding``.
+
+    :param encoding: Content coding of the request bodies (``"gzip"``, ``"deflate"``, ``"br"`` or
+        ``"zstd"``), ``"br"`` requires ``brotli`` and ``"zstd"`` requires ``zstandard``.
+    :param threshold: Minimum size in bytes of the bodies compressed.
+    :param level: Compression level, the library default when omitted.
+    """
+
+    def __init__(self, encoding: str = "gzip", threshold: int = 1024, level: Optional[int] = None) -> NoReturn:
+        """ initialize class """
+        if encoding not in available_encodings():
+            raise ConfigurationError(f"Content coding '{encoding}' is not available, "
+                                     f"supported: {', '.join(available_encodings())}.")
+        self.encoding = encoding
+        self.threshold = threshold
+        self.level = level
+
+    def encode(self, data: bytes) -> tuple:
+        """
+        Compresses a body if it is large enough.
+
+        :param data: Encoded body.
+        :return: ``(body, headers)``, headers holding the ``Content-Encoding`` of compressed bodies.
+        """
+        if data is None or len(data) < self.threshold:
+            return data, {}
+        return compress(data, self.encoding, self.level), {"Content-Encoding": self.encoding}
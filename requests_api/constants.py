@@ -1,3 +1,5 @@
+from types import MappingProxyType
+
 # supported method types
 GET    = "GET"
 HEAD   = "HEAD"
@@ -15,3 +17,9 @@ STATUS_CODES = {
     DELETE: [200, 202, 204],
     PATCH:  [200, 204]
 }
+
+# content type of bulk uploads, one JSON record per line
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# headers sent with every request unless others are configured
+DEFAULT_HEADERS = MappingProxyType({"Content-type": "application/json"})
@@ -1,10 +1,15 @@
-import json
-import simplejson
+import os
+import time
+import weakref
 import requests
 
 from requests import Session
-from typing import NoReturn, Union, Optional, TextIO
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Iterator, NoReturn, Union, Optional, TextIO
 from requests_api.constants import (
+    DEFAULT_HEADERS,
+    NDJSON_CONTENT_TYPE,
     STATUS_CODES,
     GET,
     HEAD,
@@ -13,38 +18,139 @@ from requests_api.constants import (
     DELETE,
     PATCH,
 )
-from requests_api.errors import RequestError
+from requests_api.errors import RequestError, DeadlineExceeded, ConfigurationError, CircuitOpenError
+from requests_api.batch import run_batch, run_process_batch
+from requests_api.bulk import BatchResult, encode_lines, iter_batches, iter_chunks, run_bulk
+from requests_api.files import (
+    CHUNK_SIZE,
+    PART_SUFFIX,
+    is_replayable,
+    load_validator,
+    open_body,
+    range_validator,
+    save_validator,
+    stream_range,
+    stream_ranges,
+)
+from requests_api.stream import StreamedResponse
+from requests_api.lookup import KeyPath, lookup
+from requests_api.serializers import JSONCodec, get_codec
+from requests_api.cache import BaseCache, CacheEntry, cache_key
+from requests_api.retry import RetryPolicy
+from requests_api.ratelimit import RateLimiter
+from requests_api.breaker import CircuitBreaker
+from requests_api.metrics import MetricsCollector, RequestRecord, path_template
+from requests_api.pagination import Pagination, LinkHeaderPagination, paginate
+from requests_api.prepared import PreparedEndpoint
+from requests_api.transport import HTTP1, HTTP2, HANDSHAKE_AUTH_TYPES, HTTP2Adapter
+from requests_api.compression import Compression, accept_encoding
+from requests_api.coalesce import SingleFlight
+from requests_api.hedge import HEDGED_METHODS, HedgePolicy, run_hedged
 from requests.auth import HTTPBasicAuth, HTTPDigestAuth
-from requests_oauthlib import OAuth2
-from requests_ntlm3 import HttpNtlmAuth
-from requests_kerberos import HTTPKerberosAuth
-from urllib.parse import urlunsplit, urlencode
+from urllib.parse import urlunsplit, urlencode, urlsplit
 from contextlib import suppress
-from nested_lookup import nested_lookup
+from functools import partial
+from types import MappingProxyType
+
+# only needed for type hints, the auth backends are optional
+if TYPE_CHECKING:
+    from requests_oauthlib import OAuth2
+    from requests_ntlm3 import HttpNtlmAuth
+    from requests_kerberos import HTTPKerberosAuth
+
+
+# (connect, read) timeouts in seconds used when none are configured
+DEFAULT_TIMEOUT = (10.0, 60.0)
+
+# live clients, reinitialized in the child process after ``os.fork()``
+CLIENTS = weakref.WeakSet()
+
+
+def reinitialize_clients() -> NoReturn:
+    """ ``os.register_at_fork`` hook, drops the state every client inherited from the parent process """
+    for client in list(CLIENTS):
+        client.after_fork()
+
+
+# the process id is also checked on every request, for platforms
+# without ``os.register_at_fork`` and children created with ``os.fork``
+# from C extensions (which skip the hooks)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reinitialize_clients)
+
+
+def remaining_timeout(timeout: Optional[Union[float, tuple]], expires: float) -> tuple:
+    """ caps the (connect, read) timeouts to the time left before ``expires`` """
+    remaining = expires - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Deadline exceeded before the request was sent.")
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return (
+        remaining if connect is None else min(connect, remaining),
+        remaining if read is None else min(read, remaining)
+    )
+
 
+def check_deadline(response: requests.Response, *args, expires: float, **kwargs) -> requests.Response:
+    """ response hook raising ``DeadlineExceeded`` once the deadline has passed """
+    if time.monotonic() >= expires:
+        response.close()
+        raise DeadlineExceeded("Deadline exceeded while following redirects or auth handshakes.",
+                               response.status_code, response)
+    return response
 
-class Requests:
+
+def body_size(request: requests.PreparedRequest) -> int:
+    """ bytes of a request body, from ``Content-Length`` for file objects and iterators (``0`` when chunked) """
+    body = request.body
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    if isinstance(body, memoryview):
+        return body.nbytes
+    length = request.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else 0
+
+
+def is_new_connection(response: requests.Response) -> Optional[bool]:
+    """ whether the response was received on a new connection, ``None`` if unknown """
+    connection = getattr(response.raw, "connection", None) or getattr(response.raw, "_connection", None)
+    if connection is None:
+        return None
+    new = not getattr(connection, "requests_api_used", False)
+    connection.requests_api_used = True
+    return new
+
+
+class BaseRequests:
+    """ configuration, status code validation and decoding shared by all clients """
 
     def __init__(
         self,
         baseurl: str,
-        auth: Union[HTTPBasicAuth, HTTPDigestAuth, OAuth2, HttpNtlmAuth, HTTPKerberosAuth],
+        auth: Union[HTTPBasicAuth, HTTPDigestAuth, "OAuth2", "HttpNtlmAuth", "HTTPKerberosAuth"],
         verify: Optional[Union[bool, TextIO]] = False,
         schema: Optional[str] = "https",
-        headers: Optional[dict] = {"Content-type": "application/json"},
-        allow_redirects: Optional[bool] = False
+        headers: Optional[dict] = None,
+        allow_redirects: Optional[bool] = False,
+        codec: Optional[Union[str, JSONCodec]] = "json"
     ) -> NoReturn:
         """ initialize class """
         self.baseurl = baseurl
         self.auth = auth
         self.verify = verify
         self.schema = schema
-        self.headers = headers
+
+        # read-only copy, so instances can be shared between threads and
+        # per-call headers are merged into new dictionaries instead
+        self.headers = MappingProxyType(dict(DEFAULT_HEADERS if headers is None else headers))
         self.allow_redirects = allow_redirects
+        self.codec = get_codec(codec)
 
     def encode_url(self, path: str, query_params: dict) -> str:
         """ encode url """
-        return urlunsplit((self.schema, self.baseurl, path, urlencode(query_params), ""))
+        return urlunsplit((self.schema, self.baseurl, path, urlencode(query_params or {}), ""))
 
     def expected_status_code(self, http_method: str) -> list:
         """ sets expected status codes based on method type """
@@ -53,12 +159,596 @@ class Requests:
             status_codes = STATUS_CODES[http_method]
         return status_codes
 
+    def validate_status_code(
+        self,
+        http_method: str,
+        status_code: int,
+        reason: str,
+        status_codes: Optional[list] = None
+    ) -> NoReturn:
+        """ raises ``RequestError`` if the status code returned is not expected """
+
+        # get list of expected status codes, otherwise override 
+        # with provided codes
+        expected_status_codes = (self.expected_status_code(http_method) if status_codes is None else status_codes)
+
+        # check if status code returned is "expected", otherwise 
+        # raise ``HTTPError``
+        if status_code not in expected_status_codes:
+            raise RequestError(f"Unexpected HTTP status code '{status_code}' returned with "
+                               f"reason '{reason}'")
+
+    def decode_response(
+        self,
+        response,
+        search_keys: Optional[list] = None,
+        record: Optional[RequestRecord] = None
+    ) -> Union[bool, str, dict, list]:
+        """ decodes the response body and extracts the search keys, timing both into ``record`` """
+
+        # for responses with no content, return True to indicate 
+        # that the request was successful
+        if not response.content:
+            return True
+
+        with suppress(*self.codec.decode_errors):
+            started = time.perf_counter() if record is not None else None
+            decoded = self.codec.loads(response.content)
+            if record is not None:
+                record.phases["decode"] = time.perf_counter() - started
+            if not search_keys:
+                return decoded
+
+            # every key is collected in a single walk of the document
+            started = time.perf_counter() if record is not None else None
+            results = lookup(search_keys, decoded)
+            if record is not None:
+                record.phases["lookup"] = time.perf_counter() - started
+            return results
+        return response.text
+
+
+class Requests(BaseRequests):
+
+    def __init__(
+        self,
+        baseurl: str,
+        auth: Union[HTTPBasicAuth, HTTPDigestAuth, "OAuth2", "HttpNtlmAuth", "HTTPKerberosAuth"],
+        verify: Optional[Union[bool, TextIO]] = False,
+        schema: Optional[str] = "https",
+        headers: Optional[dict] = None,
+        allow_redirects: Optional[bool] = False,
+        pool_connections: Optional[int] = 10,
+        pool_maxsize: Optional[int] = 10,
+        pool_block: Optional[bool] = False,
+        keep_alive: Optional[bool] = True,
+        codec: Optional[Union[str, JSONCodec]] = "json",
+        cache: Optional[BaseCache] = None,
+        retry: Optional[RetryPolicy] = None,
+        timeout: Optional[Union[float, tuple]] = DEFAULT_TIMEOUT,
+        rate_limiter: Optional[RateLimiter] = None,
+        metrics: Optional[MetricsCollector] = None,
+        transport: Optional[str] = HTTP1,
+        compression: Optional[Union[str, Compression]] = None,
+        coalesce: Optional[bool] = False,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: Optional[HedgePolicy] = None
+    ) -> NoReturn:
+        """ initialize class """
+        super().__init__(baseurl, auth, verify, schema, headers, allow_redirects, codec)
+        self.cache = cache
+        self.retry = retry
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.transport = transport
+        self.compression = Compression(compression) if isinstance(compression, str) else compression
+        self.single_flight = SingleFlight() if coalesce else None
+        self.breaker = breaker
+        self.hedge = hedge
+        self.pid = os.getpid()
+        self.session = self.create_session()
+        CLIENTS.add(self)
+
+    def __getstate__(self) -> dict:
+        """ configuration of the client, sent to worker processes which build their own session """
+        state = dict(self.__dict__)
+        del state["session"]
+        state["headers"] = dict(self.headers)
+
+        # digest auth keeps per-thread handshake state, only its credentials are sent
+        if isinstance(self.auth, HTTPDigestAuth):
+            state["auth"] = (HTTPDigestAuth, self.auth.username, self.auth.password)
+        return state
+
+    def __setstate__(self, state: dict) -> NoReturn:
+        self.__dict__.update(state)
+        if isinstance(self.auth, tuple):
+            auth_type, *credentials = self.auth
+            self.auth = auth_type(*credentials)
+        self.headers = MappingProxyType(self.headers)
+        self.pid = os.getpid()
+        self.session = self.create_session()
+        CLIENTS.add(self)
+
+    def __enter__(self) -> "Requests":
+        return self
+
+    def __exit__(self, *exc_info) -> NoReturn:
+        self.close()
+
+    def create_session(self) -> Session:
+        """ creates the connection-pooled session shared by every request """
+        session = Session()
+
+        # the auth object stays attached to the session for its whole
+        # lifetime, so connection-based handshakes (NTLM, Kerberos) are
+        # performed once per pooled connection rather than once per call
+        session.auth = self.auth
+        session.verify = self.verify
+        session.headers = CaseInsensitiveDict(self.headers)
+        session.headers.setdefault("Accept-Encoding", accept_encoding())
+        session.allow_redirects = self.allow_redirects
+
+        adapter = self.create_adapter()
+        if not self.keep_alive and HTTP1 == self.transport:
+            session.headers["Connection"] = "close"
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def create_adapter(self) -> Union[HTTPAdapter, HTTP2Adapter]:
+        """ creates the transport adapter selected by ``transport`` """
+        if HTTP1 == self.transport:
+            return HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+                pool_block=self.pool_block
+            )
+        if HTTP2 == self.transport:
+            # NTLM and Kerberos authenticate the connection rather than
+            # the request, which multiplexed streams cannot rely on
+            if type(self.auth).__name__ in HANDSHAKE_AUTH_TYPES:
+                raise ConfigurationError(f"'{type(self.auth).__name__}' is not supported over HTTP/2.")
+            return HTTP2Adapter(
+                verify=self.verify,
+                max_connections=self.pool_maxsize if self.pool_block else None,
+                max_keepalive_connections=self.pool_maxsize if self.keep_alive else 0,
+                http1=self.schema != "http"
+            )
+        raise ConfigurationError(f"Transport '{self.transport}' is not supported.")
+
+    def close(self) -> NoReturn:
+        """ closes the session and all pooled connections """
+        self.session.close()
+
+    def after_fork(self) -> NoReturn:
+        """
+        Drops the state inherited from the parent process, in the child after a fork.
+
+        The pooled connections (and the NTLM / Kerberos handshakes done on them) belong to the
+        parent, so the session is replaced and connections are opened (and authenticated) again by
+        the first requests of the child. Locks held by threads of the parent and calls in flight in
+        the parent are replaced in the cache, retry statistics, rate limiter, circuit breaker,
+        metrics, single-flight group and hedging policy.
+        """
+        self.pid = os.getpid()
+
+        # the connections of the parent are dropped without being closed, a
+        # TLS shutdown or HTTP/2 GOAWAY would also end them in the parent
+        self.session = self.create_session()
+        for component in (self.cache, self.retry and self.retry.stats, self.rate_limiter, self.breaker,
+                          self.metrics, self.single_flight, self.hedge):
+            if component is not None:
+                component.after_fork()
+
+    def batch(
+        self,
+        specs: list,
+        max_workers: Optional[int] = None,
+        deadline: Optional[float] = None
+    ) -> list:
+        """
+        Submits many requests concurrently over the shared connection pool.
+
+        The number of connections opened to the host is bounded by ``pool_maxsize`` (set
+        ``pool_block`` to make workers wait for a free connection instead of opening extra ones).
+
+        :param specs: ``(method, path, query_params, request_data)`` tuples, or dictionaries of
+            ``request`` keyword arguments.
+        :param max_workers: Maximum number of requests in flight, defaults to ``pool_maxsize``.
+        :param deadline: Seconds the whole batch may take.
+        :return: Results in input order, failed requests are returned as ``RequestError`` values.
+        """
+        return run_batch(self.request, specs, max_workers or self.pool_maxsize, deadline)
+
+    def process_batch(
+        self,
+        specs: list,
+        max_workers: Optional[int] = None,
+        deadline: Optional[float] = None,
+        mp_context: Optional[object] = None
+    ) -> list:
+        """
+        Submits many requests from a pool of worker processes, for responses whose decoding and
+        ``search_keys`` extraction is too CPU-heavy to run on the threads of one interpreter.
+
+        Every worker sends its requests with its own copy of the client: its own connections,
+        cache, rate limiter buckets, circuits and metrics. Limits therefore apply per process and
+        measurements made in the workers are not merged into those of this client. Only the
+        results are sent back, failed requests without their response. Streaming is not supported.
+
+        :param specs: ``(method, path, query_params, request_data)`` tuples, or dictionaries of
+            ``request`` keyword arguments.
+        :param max_workers: Number of worker processes, defaults to ``os.cpu_count()``.
+        :param deadline: Seconds the whole batch may take.
+        :param mp_context: ``multiprocessing`` context the workers are started with, the client is
+            pickled unless they are forked.
+        :return: Results in input order, failed requests are returned as ``RequestError`` values.
+        """
+        return run_process_batch(self, specs, max_workers or os.cpu_count() or 1, deadline, mp_context)
+
+    def map(
+        self,
+        method: str,
+        paths: list,
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        max_workers: Optional[int] = None,
+        deadline: Optional[float] = None
+    ) -> list:
+        """ helper method to submit the same request concurrently against many paths """
+        specs = [
+            {
+                "method": method,
+                "path": path,
+                "query_params": query_params,
+                "request_data": request_data,
+                "search_keys": search_keys,
+                "status_codes": status_codes
+            }
+            for path in paths
+        ]
+        return self.batch(specs, max_workers, deadline)
+
+    def bulk(
+        self,
+        path: str,
+        records: Iterable,
+        method: Optional[str] = "POST",
+        query_params: Optional[dict] = None,
+        batch_size: Optional[int] = 1000,
+        batch_bytes: Optional[int] = None,
+        max_in_flight: Optional[int] = 4,
+        chunked: Optional[bool] = False,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ) -> list:
+        """
+        Uploads many records as NDJSON, in batches sent in parallel or as one streamed body.
+
+        Records are encoded while the batches are sent, so at most ``max_in_flight`` batch bodies
+        are held in memory however many records the iterable (or generator) yields. Each batch is
+        a request of its own, retried as a whole by the retry policy and validated against
+        ``status_codes``; a failed batch does not stop the others.
+
+        With ``chunked``, every record is sent in a single request whose body is written (with
+        chunked transfer encoding) while the records are consumed. Such a body cannot be sent
+        twice, so it is never retried.
+
+        :param path: Path the records are uploaded to.
+        :param records: JSON-serializable records.
+        :param method: ``"POST"``, ``"PUT"`` or ``"PATCH"``.
+        :param query_params: Query parameters of every batch.
+        :param batch_size: Maximum number of records per batch, ``None`` for no limit.
+        :param batch_bytes: Maximum size in bytes of a batch body, ``None`` for no limit.
+        :param max_in_flight: Maximum number of batches sent at once.
+        :param chunked: Stream every record in one request instead of batches.
+        :param status_codes: Expected status codes of each batch, those of ``method`` by default.
+        :param timeout: (connect, read) timeouts of each batch.
+        :param deadline: Seconds the whole upload may take.
+        :param headers: Headers merged over the headers of the instance, ``Content-Type`` defaults
+            to ``application/x-ndjson``.
+        :return: ``BatchResult`` of every batch in upload order, holding its status code and its
+            decoded response or ``RequestError``.
+        """
+        http_method = method.upper()
+        if http_method not in (POST, PUT, PATCH):
+            raise ConfigurationError(f"Bulk uploads are sent with POST, PUT or PATCH, not '{method}'.")
+        if not isinstance(max_in_flight, int) or max_in_flight < 1:
+            raise ConfigurationError(f"max_in_flight must be a positive integer, not '{max_in_flight}'.")
+        if self.pid != os.getpid():
+            self.after_fork()
+
+        encoded_url = self.encode_url(path, query_params)
+        expires = time.monotonic() + deadline if deadline is not None else None
+        timeout = self.timeout if timeout is None else timeout
+        headers = {"Content-Type": NDJSON_CONTENT_TYPE, **(headers or {})}
+        lines = encode_lines(records, self.codec)
+
+        def send_batch(send, body: Union[bytes, Iterator[bytes]], result: BatchResult) -> NoReturn:
+            try:
+                response = send(http_method, encoded_url, body, False, headers, timeout, expires)
+                result.status_code = response.status_code
+                self.validate_status_code(http_method, response.status_code, response.reason, status_codes)
+                result.result = self.decode_response(response)
+            except RequestError as error:
+                result.status_code = result.status_code or error.http_errno
+                result.error = error
+
+        if chunked:
+            result = BatchResult(0, 0, 0, 0)
+            send_batch(self.send_once, iter_chunks(lines, result), result)
+            return [result]
+        return run_bulk(partial(send_batch, self.send_with_retry), iter_batches(lines, batch_size, batch_bytes),
+                        max_in_flight)
+
+    def download(
+        self,
+        path: str,
+        dest: Union[str, os.PathLike],
+        query_params: Optional[dict] = None,
+        parts: Optional[int] = 1,
+        chunk_size: Optional[int] = CHUNK_SIZE,
+        resume: Optional[bool] = True,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ) -> int:
+        """
+        Downloads a response body into a file, without holding it in memory.
+
+        The body is read from the connection and written to ``dest + ".part"`` in ``chunk_size``
+        blocks, then moved to ``dest`` once complete. A transfer interrupted midway is resumed with
+        a ``Range`` request from the last byte written; with ``resume``, so is the ``.part`` file
+        left behind by an earlier call. Resumed and parallel ranges carry ``If-Range`` with the
+        ``ETag`` (or ``Last-Modified``) of the body, a server whose body changed meanwhile sends
+        it again in full. The validator of a ``.part`` file is kept next to it (``.part.validator``),
+        a ``.part`` file without one is downloaded again from its first byte.
+
+        With ``parts`` above 1, the size of the body is probed with a ``HEAD`` request and its
+        ranges are fetched in parallel, each over a connection of its own (``pool_maxsize``
+        should allow for them). Servers not advertising ``Accept-Ranges: bytes`` are downloaded
+        over one connection.
+
+        :param path: Path of the body downloaded.
+        :param dest: File the body is written to, replaced once the download completes.
+        :param query_params: Query parameters.
+        :param parts: Number of ranges fetched in parallel.
+        :param chunk_size: Bytes buffered before they are written to disk.
+        :param resume: Resume the ``.part`` file of an earlier, interrupted download.
+        :param status_codes: Expected status codes, ``200`` and ``206`` by default.
+        :param timeout: (connect, read) timeouts of each request.
+        :param deadline: Seconds the whole download may take.
+        :param headers: Headers merged over the headers of the instance.
+        :return: Size of the file in bytes.
+        """
+        if self.pid != os.getpid():
+            self.after_fork()
+
+        dest = os.fspath(dest)
+        partial_path = dest + PART_SUFFIX
+        encoded_url = self.encode_url(path, query_params)
+        expires = time.monotonic() + deadline if deadline is not None else None
+        timeout = self.timeout if timeout is None else timeout
+        status_codes = status_codes or [200, 206]
+
+        # ranges are offsets into the body as sent, which decoding would shift
+        headers = {**(headers or {}), "Accept-Encoding": "identity"}
+        validator = None
+        sequential = True
+
+        def fetch(start: int, end: Optional[int]) -> requests.Response:
+            nonlocal validator
+            range_headers = dict(headers)
+            if start or end is not None:
+                range_headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+                if validator is not None:
+                    range_headers["If-Range"] = validator
+            response = self.send_with_retry(GET, encoded_url, None, True, range_headers, timeout, expires)
+            try:
+                self.validate_status_code(GET, response.status_code, response.reason, status_codes)
+            except RequestError:
+                response.close()
+                raise
+            # a whole body is of the version the following ranges must match
+            if validator is None or 200 == response.status_code:
+                latest = range_validator(response.headers)
+                if sequential and latest != validator:
+                    save_validator(partial_path, latest)
+                validator = latest
+            return response
+
+        size = None
+        if parts > 1:
+            response = self.send_with_retry(HEAD, encoded_url, None, False, headers, timeout, expires)
+            length = response.headers.get("Content-Length")
+            if "bytes" == response.headers.get("Accept-Ranges") and length and length.isdigit():
+                size = int(length)
+                validator = range_validator(response.headers)
+                parts = min(parts, -(-size // chunk_size))
+                sequential = parts < 2
+
+        try:
+            if not sequential:
+                stream_ranges(fetch, partial_path, size, parts, chunk_size)
+            else:
+                # the bytes of an earlier call are resumed only if their version is known,
+                # the validator of a probe is of the current version, not of those bytes
+                validator = load_validator(partial_path) if resume else None
+                with open(partial_path, "ab" if validator is not None else "wb") as file:
+                    start = file.tell()
+                if not start:
+                    save_validator(partial_path, None)
+                    validator = None
+                size = stream_range(fetch, partial_path, start, None, chunk_size)
+        except BaseException:
+            # parallel ranges leave holes, only a sequential download can be resumed
+            if not resume or not sequential:
+                with suppress(OSError):
+                    os.remove(partial_path)
+                save_validator(partial_path, None)
+            raise
+        os.replace(partial_path, dest)
+        save_validator(partial_path, None)
+        return size
+
+    def upload(
+        self,
+        path: str,
+        src: Union[str, os.PathLike, BinaryIO],
+        method: Optional[str] = "PUT",
+        query_params: Optional[dict] = None,
+        content_type: Optional[str] = "application/octet-stream",
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ) -> Union[bool, str, dict, list]:
+        """
+        Uploads a file as the request body, without reading it into memory.
+
+        Regular files are memory-mapped and handed to the socket as a ``memoryview``, so the
+        body is never copied into Python ``bytes``, and retried by the retry policy like any other
+        request. Other file objects (pipes, sockets, in-memory files) are read and sent in blocks,
+        and since they cannot be read twice, never retried.
+
+        :param path: Path the file is uploaded to.
+        :param src: Path of the file, or file object opened in binary mode (sent from its
+            current position).
+        :param method: ``"POST"``, ``"PUT"`` or ``"PATCH"``.
+        :param query_params: Query parameters.
+        :param content_type: ``Content-Type`` of the body.
+        :param search_keys: Keys searched for in the decoded response, like ``get``.
+        :param status_codes: Expected status codes, those of ``method`` by default.
+        :param timeout: (connect, read) timeouts.
+        :param deadline: Seconds the upload may take.
+        :param headers: Headers merged over the headers of the instance.
+        :return: Decoded response, ``True`` for an empty body.
+        """
+        http_method = method.upper()
+        if http_method not in (POST, PUT, PATCH):
+            raise ConfigurationError(f"Uploads are sent with POST, PUT or PATCH, not '{method}'.")
+        if self.pid != os.getpid():
+            self.after_fork()
+
+        encoded_url = self.encode_url(path, query_params)
+        expires = time.monotonic() + deadline if deadline is not None else None
+        timeout = self.timeout if timeout is None else timeout
+        headers = {"Content-Type": content_type, **(headers or {})}
+
+        with open_body(src) as body:
+            if is_replayable(body):
+                send = self.send_with_retry
+            else:
+                send = self.send_once
+            response = send(http_method, encoded_url, body, False, headers, timeout, expires)
+        self.validate_status_code(http_method, response.status_code, response.reason, status_codes)
+        return self.decode_response(response, search_keys)
+
+    def paginate(
+        self,
+        path: str,
+        query_params: Optional[dict] = None,
+        pagination: Optional[Pagination] = None,
+        items_key: Optional[Union[str, KeyPath]] = None,
+        status_codes: Optional[list] = None,
+        max_pages: Optional[int] = None,
+        max_in_flight: Optional[int] = 1,
+        timeout: Optional[Union[float, tuple]] = None
+    ) -> Iterator:
+        """
+        Iterates over the items of a paginated collection.
+
+        The next page(s) are fetched in the background while the items of the current page are
+        consumed, so only the pages in flight are held in memory.
+
+        :param path: Path of the first page.
+        :param query_params: Query parameters of the first page.
+        :param pagination: ``LinkHeaderPagination`` (default), ``CursorPagination`` or ``OffsetPagination``.
+        :param items_key: Key (searched for like ``search_keys``) or ``KeyPath`` of the items in each
+            page, the page itself when omitted.
+        :param status_codes: Expected status codes of each page.
+        :param max_pages: Maximum number of pages fetched.
+        :param max_in_flight: Maximum number of pages fetched ahead of the one being consumed.
+        :param timeout: (connect, read) timeouts of each page.
+        :return: Iterator of items.
+        """
+        if self.pid != os.getpid():
+            self.after_fork()
+
+        def fetch(page_path: str, page_params: dict) -> tuple:
+            response = self.send_with_retry(
+                GET,
+                self.encode_url(page_path, page_params),
+                timeout=self.timeout if timeout is None else timeout
+            )
+            self.validate_status_code(GET, response.status_code, response.reason, status_codes)
+            return response, self.decode_response(response)
+
+        return paginate(
+            fetch,
+            pagination or LinkHeaderPagination(),
+            path,
+            query_params or {},
+            items_key,
+            max_pages,
+            max_in_flight
+        )
+
+    def prepare(
+        self,
+        method: str,
+        path_template: str,
+        query_params: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        stream: Optional[bool] = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        headers: Optional[dict] = None
+    ) -> PreparedEndpoint:
+        """
+        Prepares a request to one endpoint, for calling it many times.
+
+        The method, headers, credentials, proxies, expected status codes and the compiled path
+        template are worked out once; every call of the endpoint returned only fills in the path
+        variables and sends it through the same pipeline as ``request``, e.g.
+        ``r.prepare("GET", "/users/{id}")(id=42)``.
+
+        :param method: HTTP method.
+        :param path_template: Path with ``{name}`` placeholders, percent-encoded when filled in.
+        :param query_params: Query parameters of every call.
+        :param search_keys: Keys searched for in every decoded response.
+        :param status_codes: Expected status codes, those of ``method`` by default.
+        :param stream: Return a ``StreamedResponse`` instead of the decoded body.
+        :param timeout: (connect, read) timeouts, those of the instance by default.
+        :param headers: Headers merged over the headers of the instance.
+        :return: ``PreparedEndpoint``, called with the path variables as keyword arguments.
+        """
+        return PreparedEndpoint(
+            self, method.upper(), path_template, query_params, search_keys, status_codes, stream, timeout, headers
+        )
+
     def get(
         self,
         path: str,
-        query_params: Optional[dict] = {},
-        search_keys: Optional[list] = [],
-        status_codes: Optional[list] = [200]
+        query_params: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        stream: Optional[bool] = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
     ):
         """ helper method for get request """
         return self.request(
@@ -66,15 +756,22 @@ class Requests:
             path=path, 
             query_params=query_params, 
             search_keys=search_keys,
-            status_codes=status_codes
+            status_codes=status_codes,
+            stream=stream,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
         )
 
     def head(
         self,
         path: str,
-        query_params: Optional[dict] = {},
-        search_keys: Optional[list] = [],
-        status_codes: Optional[list] = [200]
+        query_params: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
     ):
         """ helper method for head request """
         return self.request(
@@ -82,16 +779,23 @@ class Requests:
             path=path, 
             query_params=query_params, 
             search_keys=search_keys,
-            status_codes=status_codes
+            status_codes=status_codes,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
         )
 
     def post(
         self,
         path: str,
-        query_params: Optional[dict] = {},
-        request_data: Optional[dict] = {},
-        search_keys: Optional[list] = [],
-        status_codes: Optional[list] = [200, 201, 204]
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        stream: Optional[bool] = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
     ):
         """ helper method for post request """
         return self.request(
@@ -100,16 +804,24 @@ class Requests:
             query_params=query_params,
             request_data=request_data,
             search_keys=search_keys,
-            status_codes=status_codes
+            status_codes=status_codes,
+            stream=stream,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
         )
 
     def put(
         self,
         path: str,
-        query_params: Optional[dict] = {},
-        request_data: Optional[dict] = {},
-        search_keys: Optional[list] = [],
-        status_codes: Optional[list] = [200, 202, 204]
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        stream: Optional[bool] = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
     ):
         """ helper method for put request """
         return self.request(
@@ -118,15 +830,23 @@ class Requests:
             query_params=query_params,
             request_data=request_data,
             search_keys=search_keys,
-            status_codes=status_codes
+            status_codes=status_codes,
+            stream=stream,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
         )
 
     def delete(
         self,
         path: str,
-        query_params: Optional[dict] = {},
-        search_keys: Optional[list] = [],
-        status_codes: Optional[list] = [200, 202, 204]
+        query_params: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        stream: Optional[bool] = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
     ):
         """ helper method for delete request """
         return self.request(
@@ -134,16 +854,24 @@ class Requests:
             path=path, 
             query_params=query_params,
             search_keys=search_keys,
-            status_codes=status_codes
+            status_codes=status_codes,
+            stream=stream,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
         )
 
     def patch(
         self,
         path: str,
-        query_params: Optional[dict] = {},
-        request_data: Optional[dict] = {},
-        search_keys: Optional[list] = [],
-        status_codes: Optional[list] = [200, 204]
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        stream: Optional[bool] = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
     ):
         """ helper method for patch request """
         return self.request(
@@ -152,43 +880,326 @@ class Requests:
             query_params=query_params,
             request_data=request_data,
             search_keys=search_keys,
-            status_codes=status_codes
+            status_codes=status_codes,
+            stream=stream,
+            timeout=timeout,
+            deadline=deadline,
+            headers=headers
         )
 
     def request(
         self,
         method: str,
         path: str,
-        query_params: Optional[dict] = {},
-        request_data: Optional[dict] = {},
-        search_keys: Optional[list] = [],
-        status_codes: Optional[list] = None
-    ) -> Union[bool, str]:
-        """ submits http request """
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        stream: Optional[bool] = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None
+    ) -> Union[bool, str, StreamedResponse]:
+        """
+        submits http request, ``stream`` returns a ``StreamedResponse`` once the status is validated
+        or, combined with ``search_keys``, extracts the keys incrementally from the body
+
+        ``timeout`` overrides the (connect, read) timeouts of the instance, ``deadline`` caps the
+        seconds spent on redirects, retries and auth handshakes until the response headers arrive,
+        ``headers`` are merged over the headers of the instance for this call only
+        """
+
+        if self.pid != os.getpid():
+            self.after_fork()
 
         http_method = method.upper()
+        if self.metrics is None:
+            return self.perform(
+                http_method, path, query_params, request_data, search_keys, status_codes, stream, timeout, deadline,
+                headers
+            )
 
-        session = Session()
-        session.auth = self.auth
-        session.verify = self.verify
-        session.headers = self.headers
-        session.allow_redirects = self.allow_redirects
+        record = RequestRecord(http_method, self.metrics.path_template(path))
+        self.metrics.pre_request(record)
+        try:
+            return self.perform(
+                http_method, path, query_params, request_data, search_keys, status_codes, stream, timeout, deadline,
+                headers, record
+            )
+        except RequestError as error:
+            record.error = error
+            record.status_code = record.status_code or error.http_errno
+            raise
+        finally:
+            record.phases["total"] = time.perf_counter() - record.started
+            self.metrics.post_request(record)
 
-        encoded_url = self.encode_url(path, query_params)
+    def perform(
+        self,
+        http_method: str,
+        path: str,
+        query_params: Optional[dict] = None,
+        request_data: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        stream: Optional[bool] = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None,
+        record: Optional[RequestRecord] = None,
+        template: Optional[PreparedEndpoint] = None
+    ) -> Union[bool, str, StreamedResponse]:
+        """
+        runs the request pipeline (cache, send, validation, decoding), timing each phase into ``record``,
+        requests of a prepared endpoint are built from its ``template``
+        """
+        if template is None:
+            encoded_url = self.encode_url(path, query_params)
+        else:
+            encoded_url = template.encode_url(path, query_params)
+        expires = time.monotonic() + deadline if deadline is not None else None
+
+        # GET responses are served from the cache while fresh, and
+        # revalidated with a conditional request once stale
+        entry, key = None, None
+        if self.cache is not None and GET == http_method and not stream:
+            started = time.perf_counter() if record is not None else None
+            key = cache_key(http_method, encoded_url, {**self.headers, **(headers or {})}, self.auth)
+            entry = self.cache.get(key) if key is not None else None
+            fresh = entry is not None and entry.is_fresh()
+            if record is not None:
+                record.phases["cache"] = time.perf_counter() - started
+                record.cache = "hit" if fresh else "miss" if entry is None else "stale"
+                record.status_code = 200 if fresh else 0
+            if fresh:
+                return entry.result(search_keys)
 
+        # the body is always read below, so its download can be told apart
+        # from the time spent waiting for the response headers
+        started = time.perf_counter() if record is not None else None
+        if entry is not None:
+            headers = {**(headers or {}), **entry.validators()}
+        timeout = self.timeout if timeout is None else timeout
+        shared = False
+        if self.single_flight is not None and http_method in (GET, HEAD) and not stream:
+            response, shared = self.send_coalesced(http_method, encoded_url, headers, timeout, expires, record,
+                                                   template)
+        elif self.hedge is not None and http_method in HEDGED_METHODS:
+            response = self.send_hedged(http_method, encoded_url, None, True, headers, timeout, expires, record,
+                                        template)
+        else:
+            response = self.send_with_retry(
+                http_method, encoded_url, request_data, True, headers, timeout, expires, record, template
+            )
+        if record is not None:
+            record.phases["send"] = time.perf_counter() - started
+            record.status_code = response.status_code
+            if not shared:
+                record.phases["server"] = response.elapsed.total_seconds()
+                record.bytes_out = body_size(response.request)
+                if record.new_connection is None:
+                    record.new_connection = is_new_connection(response)
+
+        if entry is not None and response.status_code == 304:
+            response.close()
+            if record is not None:
+                record.cache = "revalidated"
+            self.cache.set(key, entry.revalidate(response))
+            return entry.result(search_keys)
+
+        # validated before any streamed chunk is handed out, an unexpected
+        # status code releases the connection straight away
         try:
-            if GET == http_method:
-                response = session.get(encoded_url)
+            self.validate_status_code(http_method, response.status_code, response.reason, status_codes)
+        except RequestError:
+            response.close()
+            raise
+
+        if stream and search_keys:
+            return StreamedResponse(response, self.codec).lookup(search_keys)
+        if stream:
+            return StreamedResponse(response, self.codec)
+
+        if record is not None and not shared:
+            started = time.perf_counter()
+            record.bytes_in = len(response.content)
+            record.phases["download"] = time.perf_counter() - started
+
+        if key is not None and response.status_code == 200 and not shared:
+            entry = CacheEntry.from_response(response, self.codec)
+            if entry is not None:
+                self.cache.set(key, entry)
+                return entry.result(search_keys)
+        return self.decode_response(response, search_keys, record)
+
+    def send_coalesced(
+        self,
+        http_method: str,
+        encoded_url: str,
+        headers: Optional[dict] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        expires: Optional[float] = None,
+        record: Optional[RequestRecord] = None,
+        template: Optional[PreparedEndpoint] = None
+    ) -> tuple:
+        """ sends one GET / HEAD request for all identical concurrent calls, returns ``(response, shared)`` """
+        def fetch() -> requests.Response:
+            send = self.send_with_retry if self.hedge is None else self.send_hedged
+            response = send(http_method, encoded_url, None, True, headers, timeout, expires, record, template)
+            if record is not None:
+                record.new_connection = is_new_connection(response)
+
+            # read once here, so every caller can decode the body
+            response.content
+            return response
+
+        key = (http_method, encoded_url, tuple(sorted((headers or {}).items())))
+        on_join = None
+        if record is not None:
+            on_join = partial(self.metrics.increment, "coalesced", method=http_method, path=record.path)
+        return self.single_flight.do(key, fetch, expires, on_join)
+
+    def send_hedged(
+        self,
+        http_method: str,
+        encoded_url: str,
+        request_data: Optional[dict] = None,
+        stream: Optional[bool] = False,
+        headers: Optional[dict] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        expires: Optional[float] = None,
+        record: Optional[RequestRecord] = None,
+        template: Optional[PreparedEndpoint] = None
+    ) -> requests.Response:
+        """ sends a GET / HEAD request, and an identical one when the first is slower than the hedging delay """
+        if record is not None:
+            path = record.path
+        elif template is not None:
+            path = template.label
+        else:
+            path = path_template(urlsplit(encoded_url).path)
+        key = (self.baseurl, http_method, path)
+        self.hedge.record(self.baseurl)
+
+        def attempt() -> requests.Response:
+            started = time.monotonic()
+            response = self.send_with_retry(
+                http_method, encoded_url, request_data, stream, headers, timeout, expires, record, template
+            )
+            self.hedge.observe(key, time.monotonic() - started)
+            return response
+
+        # nothing to hedge against until the latencies of the path are known
+        delay = self.hedge.delay(key)
+        if delay is None:
+            return attempt()
+
+        response, hedged, won = run_hedged(attempt, delay, partial(self.hedge.allow, self.baseurl))
+        if won:
+            self.hedge.won(self.baseurl)
+        if record is not None and hedged:
+            self.metrics.increment("hedged", method=http_method, path=record.path)
+            if won:
+                self.metrics.increment("hedge_won", method=http_method, path=record.path)
+        return response
+
+    def send(
+        self,
+        http_method: str,
+        encoded_url: str,
+        request_data: Optional[dict] = None,
+        stream: Optional[bool] = False,
+        headers: Optional[dict] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        expires: Optional[float] = None,
+        template: Optional[PreparedEndpoint] = None
+    ) -> requests.Response:
+        """ sends the request over the pooled session, raising ``RequestError`` for 4xx / 5xx """
+        session = self.session
+        hooks = None
+
+        # every hop (redirects, auth handshakes) is checked against the deadline
+        # and may only wait for whatever time is left of it
+        if expires is not None:
+            timeout = remaining_timeout(timeout, expires)
+            hooks = {"response": partial(check_deadline, expires=expires)}
+
+        # ``verify`` is passed on every call, since the ``REQUESTS_CA_BUNDLE`` and
+        # ``CURL_CA_BUNDLE`` environment variables take precedence over the session
+        try:
+            # prepared endpoints skip the merging of settings and environment lookups
+            # ``Session.request`` repeats on every call, having done them up front
+            if template is not None:
+                data = None
+                if http_method in (POST, PUT, PATCH):
+                    data, headers = self.encode_body(request_data, headers)
+                response = session.send(
+                    template.prepare_request(session, encoded_url, data, headers, hooks),
+                    stream=stream,
+                    timeout=timeout,
+                    allow_redirects=template.allow_redirects,
+                    **template.settings
+                )
+            elif GET == http_method:
+                response = session.get(
+                    encoded_url,
+                    stream=stream,
+                    headers=headers,
+                    timeout=timeout,
+                    hooks=hooks,
+                    verify=self.verify
+                )
             elif HEAD == http_method:
-                response = session.head(encoded_url)
+                response = session.head(
+                    encoded_url,
+                    stream=stream,
+                    headers=headers,
+                    timeout=timeout,
+                    hooks=hooks,
+                    verify=self.verify
+                )
             elif POST == http_method:
-                response = session.post(encoded_url, data=json.dumps(request_data))
+                data, headers = self.encode_body(request_data, headers)
+                response = session.post(
+                    encoded_url,
+                    data=data,
+                    stream=stream,
+                    headers=headers,
+                    timeout=timeout,
+                    hooks=hooks,
+                    verify=self.verify
+                )
             elif PUT == http_method:
-                response = session.put(encoded_url, data=json.dumps(request_data))
+                data, headers = self.encode_body(request_data, headers)
+                response = session.put(
+                    encoded_url,
+                    data=data,
+                    stream=stream,
+                    headers=headers,
+                    timeout=timeout,
+                    hooks=hooks,
+                    verify=self.verify
+                )
             elif DELETE == http_method:
-                response = session.delete(encoded_url)
+                response = session.delete(
+                    encoded_url,
+                    stream=stream,
+                    headers=headers,
+                    timeout=timeout,
+                    hooks=hooks,
+                    verify=self.verify
+                )
             elif PATCH == http_method:
-                response = session.patch(encoded_url, data=json.dumps(request_data))
+                data, headers = self.encode_body(request_data, headers)
+                response = session.patch(
+                    encoded_url,
+                    data=data,
+                    stream=stream,
+                    headers=headers,
+                    timeout=timeout,
+                    hooks=hooks,
+                    verify=self.verify
+                )
             else:
                 raise RequestError(f"HTTP method type '{http_method}' is not supported.")
     
@@ -198,29 +1209,155 @@ class Requests:
                 requests.ConnectionError,
                 requests.Timeout,
                 requests.exceptions.RequestException) as exception:
-            raise RequestError(exception, response.status_code)
-        finally:
-            session.close()
+            # connection failures and timeouts never produce a response
+            http_errno = 0
+            if exception.response is not None:
+                http_errno = exception.response.status_code
+                exception.response.close()
+            raise RequestError(exception, http_errno, exception.response)
+        return response
 
-        # get list of expected status codes, otherwise override 
-        # with provided codes
-        expected_status_codes = (self.expected_status_code(http_method) if status_codes is None else status_codes)
+    def encode_body(
+        self,
+        request_data: Optional[Union[dict, list, bytes, memoryview, BinaryIO, Iterator[bytes]]],
+        headers: Optional[dict] = None
+    ) -> tuple:
+        """
+        encodes (and compresses, when configured) a request body, returns ``(data, headers)``,
+        encoded bodies (``bytes``, ``memoryview``, file objects or iterators of ``bytes``) are sent as they are,
+        file objects and iterators are read once and never retried
+        """
+        if isinstance(request_data, (bytes, memoryview, Iterator)) or hasattr(request_data, "read"):
+            data = request_data
+        else:
+            data = self.codec.dumps({} if request_data is None else request_data)
 
-        # check if status code returned is "expected", otherwise 
-        # raise ``HTTPError``
-        if response.status_code not in expected_status_codes:
-            raise RequestError(f"Unexpected HTTP status code '{response.status_code}' returned with "
-                               f"reason '{response.reason}'")
+        # streamed bodies are never compressed, their size is not known up front
+        if self.compression is None or not isinstance(data, bytes):
+            return data, headers
+        data, encoding_headers = self.compression.encode(data)
+        return data, {**(headers or {}), **encoding_headers}
 
-        # for responses with no content, return True to indicate 
-        # that the request was successful
-        if not response.content:
-            return True
+    def send_with_retry(
+        self,
+        http_method: str,
+        encoded_url: str,
+        request_data: Optional[dict] = None,
+        stream: Optional[bool] = False,
+        headers: Optional[dict] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        expires: Optional[float] = None,
+        record: Optional[RequestRecord] = None,
+        template: Optional[PreparedEndpoint] = None
+    ) -> requests.Response:
+        """ sends the request, retrying transient failures according to the retry policy """
+        started = time.monotonic()
+        retry = 0
+        while True:
+            if self.retry is not None:
+                self.retry.stats.record(self.baseurl, retry > 0)
+            try:
+                return self.send_once(
+                    http_method, encoded_url, request_data, stream, headers, timeout, expires, template
+                )
+            except (DeadlineExceeded, CircuitOpenError):
+                raise
+            except RequestError as error:
+                # a timeout cut short by the deadline is reported as such
+                if expires is not None and time.monotonic() >= expires:
+                    raise DeadlineExceeded(f"Deadline exceeded: {error.message}", error.http_errno, error.response)
+                # a file object or iterator body was consumed by the failed attempt
+                if self.retry is None or not is_replayable(request_data):
+                    raise
+                retry += 1
+                delay = self.retry.next_delay(self.baseurl, http_method, error, retry, started)
+                if delay is None or (expires is not None and time.monotonic() + delay >= expires):
+                    raise
+            if record is not None:
+                record.retries = retry
+            time.sleep(delay)
 
-        with suppress(json.JSONDecodeError, simplejson.JSONDecodeError):
-            response = response.json()
-            if not search_keys:
-                return response
-            results = [nested_lookup(key, response) for key in search_keys]
-            return [item for sublist in results for item in sublist]
-        return response.text
+    def send_once(
+        self,
+        http_method: str,
+        encoded_url: str,
+        request_data: Optional[dict] = None,
+        stream: Optional[bool] = False,
+        headers: Optional[dict] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        expires: Optional[float] = None,
+        template: Optional[PreparedEndpoint] = None
+    ) -> requests.Response:
+        """ sends a single attempt, through the rate limiter and the circuit breaker when they are configured """
+        if self.rate_limiter is not None:
+            return self.send_limited(
+                http_method, encoded_url, request_data, stream, headers, timeout, expires, template
+            )
+        if self.breaker is not None:
+            return self.send_guarded(
+                http_method, encoded_url, request_data, stream, headers, timeout, expires, template
+            )
+        return self.send(http_method, encoded_url, request_data, stream, headers, timeout, expires, template)
+
+    def send_guarded(
+        self,
+        http_method: str,
+        encoded_url: str,
+        request_data: Optional[dict] = None,
+        stream: Optional[bool] = False,
+        headers: Optional[dict] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        expires: Optional[float] = None,
+        template: Optional[PreparedEndpoint] = None
+    ) -> requests.Response:
+        """ sends a single attempt once the circuit breaker allows it, recording its outcome """
+        self.breaker.acquire(self.baseurl)
+        started = time.monotonic()
+        failed = None
+        try:
+            response = self.send(
+                http_method, encoded_url, request_data, stream, headers, timeout, expires, template
+            )
+            failed = False
+            return response
+        except DeadlineExceeded:
+            raise
+        except RequestError as error:
+            # a timeout cut short by the deadline of the caller is not a failure of the host
+            if expires is None or time.monotonic() < expires:
+                failed = self.breaker.is_failure(error)
+            raise
+        finally:
+            self.breaker.release(self.baseurl, failed, time.monotonic() - started)
+
+    def send_limited(
+        self,
+        http_method: str,
+        encoded_url: str,
+        request_data: Optional[dict] = None,
+        stream: Optional[bool] = False,
+        headers: Optional[dict] = None,
+        timeout: Optional[Union[float, tuple]] = None,
+        expires: Optional[float] = None,
+        template: Optional[PreparedEndpoint] = None
+    ) -> requests.Response:
+        """
+        sends the request once the rate limiter allows it, adapting the limits to the response,
+        the circuit breaker is only asked once a permit is granted, so its timings and trial calls
+        never include the time spent queued
+        """
+        path = urlsplit(encoded_url).path
+        send = self.send if self.breaker is None else self.send_guarded
+        response = None
+        try:
+            with self.rate_limiter.acquire(self.baseurl, path, expires):
+                response = send(
+                    http_method, encoded_url, request_data, stream, headers, timeout, expires, template
+                )
+        except RequestError as error:
+            response = error.response
+            raise
+        finally:
+            if response is not None:
+                self.rate_limiter.update(self.baseurl, path, response.status_code, response.headers)
+        return response
@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 
-from typing import NoReturn
+from typing import NoReturn, Optional
 
 
 class HTTPError(RuntimeError):
@@ -30,5 +30,22 @@ class RequestError(HTTPError):
     description = ("HTTP requests returned an status code 4xx or 5xx, or "
                    "an unexpected status code")
 
-    def __init__(self, message: str, http_errno: int = 0) -> NoReturn:
+    def __init__(self, message: str, http_errno: int = 0, response: Optional[object] = None) -> NoReturn:
         super().__init__(message, http_errno)
+        self.response = response
+
+
+class DeadlineExceeded(RequestError):
+    """ exception raised when a request does not complete within its deadline """
+    errno = 3
+    errtype = "DEADLINE_EXCEEDED"
+    description = ("HTTP request (including redirects, retries and auth handshakes) did not "
+                   "complete within its deadline")
+
+
+class CircuitOpenError(RequestError):
+    """ exception raised when a request is rejected by an open circuit breaker """
+    errno = 4
+    errtype = "CIRCUIT_OPEN"
+    description = ("HTTP request was not sent because the circuit breaker of the host is open "
+                   "after too many failed or slow calls")
@@ -0,0 +1,203 @@
+import io
+import mmap
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from typing import Any, BinaryIO, Callable, Iterator, NoReturn, Optional, Union
+from requests import Response
+from requests.exceptions import RequestException
+from requests_api.errors import RequestError
+
+
+# bytes buffered before they are written to disk
+CHUNK_SIZE = 1024 * 1024
+
+# bytes read from the connection at a time, those of a read cut short by a
+# dropped connection are lost and fetched again
+READ_SIZE = 128 * 1024
+
+# suffix of the file a download is written to until it completes
+PART_SUFFIX = ".part"
+
+# suffix of the file keeping the validator of the body a ``.part`` file holds
+VALIDATOR_SUFFIX = ".validator"
+
+
+def parse_content_range(value: Optional[str]) -> Optional[tuple]:
+    """ parses ``bytes 0-99/1234`` (or ``bytes */1234``) into ``(start, end, total)``, unknown parts as ``None`` """
+    if not value or not value.startswith("bytes "):
+        return None
+    span, _, total = value[6:].partition("/")
+    start, _, end = span.partition("-")
+    try:
+        return (
+            int(start) if start and start != "*" else None,
+            int(end) if end else None,
+            int(total) if total and total != "*" else None
+        )
+    except ValueError:
+        return None
+
+
+def split_ranges(size: int, parts: int) -> list:
+    """ splits ``size`` bytes into ``parts`` contiguous ``(start, end)`` ranges, ``end`` inclusive """
+    step = -(-size // parts)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+def range_validator(headers: dict) -> Optional[str]:
+    """ strong ``ETag`` or ``Last-Modified`` of a response, sent as ``If-Range`` so every range is of the same version """
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def load_validator(path: str) -> Optional[str]:
+    """ validator of the body an earlier download wrote to ``path``, ``None`` when unknown """
+    try:
+        with open(path + VALIDATOR_SUFFIX, encoding="utf-8") as file:
+            return file.read().strip() or None
+    except OSError:
+        return None
+
+
+def save_validator(path: str, validator: Optional[str]) -> NoReturn:
+    """ keeps the validator of the body written to ``path`` next to it, removing it when there is none """
+    if validator is None:
+        with suppress(OSError):
+            os.remove(path + VALIDATOR_SUFFIX)
+        return
+    with open(path + VALIDATOR_SUFFIX, "w", encoding="utf-8") as file:
+        file.write(validator)
+
+
+def stream_range(
+    fetch: Callable[[int, Optional[int]], Response],
+    path: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> int:
+    """
+    Downloads bytes ``start`` to ``end`` of a body into the file ``path``, at the same offset.
+
+    An interrupted transfer is resumed with a ``Range`` request from the last byte written, for as
+    long as every attempt makes progress.
+
+    :param fetch: Sends the request of a range, returns the validated, streamed response.
+    :param path: Existing file the range is written into.
+    :param start: First byte of the range, for a whole body the size already written.
+    :param end: Last byte of the range (inclusive), ``None`` for the end of the body.
+    :param chunk_size: Bytes buffered before they are written to disk.
+    :return: Offset past the last byte written.
+    """
+    offset = start
+    with open(path, "r+b", buffering=chunk_size) as file:
+        file.seek(offset)
+        while True:
+            try:
+                response = fetch(offset, end)
+            except RequestError as error:
+                # the previous attempt ended with the last byte of the body
+                content_range = parse_content_range(error.response.headers.get("Content-Range")) \
+                    if error.http_errno == 416 and error.response is not None else None
+                if content_range is not None and end is None and content_range[2] == offset:
+                    file.truncate(offset)
+                    return offset
+                raise
+
+            attempt = offset
+            try:
+                if 200 == response.status_code and offset:
+                    # the range was ignored (or the body changed), the whole body is sent again
+                    if end is not None:
+                        raise RequestError(f"Range requests are not supported by '{response.url}'.",
+                                           response.status_code, response)
+                    file.seek(0)
+                    file.truncate()
+                    offset = 0
+                for chunk in response.iter_content(min(chunk_size, READ_SIZE)):
+                    file.write(chunk)
+                    offset += len(chunk)
+                if end is None:
+                    file.truncate(offset)
+                return offset
+            except RequestException as exception:
+                if offset == attempt:
+                    raise RequestError(exception, response.status_code, response)
+            finally:
+                response.close()
+
+
+def stream_ranges(
+    fetch: Callable[[int, Optional[int]], Response],
+    path: str,
+    size: int,
+    parts: int,
+    chunk_size: int = CHUNK_SIZE
+) -> int:
+    """
+    Downloads a body of ``size`` bytes into the file ``path`` as ``parts`` ranges fetched in parallel.
+
+    The file is allocated to its full size up front, so every range is written in place.
+
+    :param fetch: Sends the request of a range, returns the validated, streamed response.
+    :param path: File the body is written to.
+    :param size: Size of the body in bytes.
+    :param parts: Number of ranges, each sent over a connection of its own.
+    :param chunk_size: Bytes buffered before they are written to disk.
+    :return: Size of the body.
+    """
+    with open(path, "wb") as file:
+        file.truncate(size)
+
+    ranges = split_ranges(size, parts)
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(stream_range, fetch, path, start, end, chunk_size) for start, end in ranges]
+        for future, (start, end) in zip(futures, ranges):
+            if future.result() != end + 1:
+                raise RequestError(f"Range {start}-{end} of '{path}' ended early.")
+    return size
+
+
+@contextmanager
+def open_body(src: Union[str, os.PathLike, BinaryIO]) -> Iterator[Union[memoryview, BinaryIO]]:
+    """
+    Maps a file into memory as a request body, from its current position.
+
+    The ``memoryview`` yielded is handed to ``socket.sendall()`` as it is, so the file is never
+    copied into Python ``bytes``. Files that cannot be mapped (empty files, pipes, in-memory
+    files) are yielded as they are and read in blocks.
+
+    :param src: Path, or file object opened in binary mode.
+    :return: Context manager yielding the body.
+    """
+    file = open(src, "rb") if isinstance(src, (str, os.PathLike)) else src
+    try:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            mapped = None
+
+        if mapped is None:
+            yield file
+            return
+
+        whole = memoryview(mapped)
+        view = whole[file.tell():]
+        try:
+            yield view
+        finally:
+            view.release()
+            whole.release()
+            mapped.close()
+    finally:
+        if file is not src:
+            file.close()
+
+
+def is_replayable(body: Any) -> bool:
+    """ whether a body can be sent again, by retries and redirects, file objects and iterators are read once """
+    return not hasattr(body, "read") and not isinstance(body, Iterator)
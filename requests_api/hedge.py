@@ -0,0 +1,189 @@
+import math
+import queue
+import threading
+
+from collections import deque
+from typing import Callable, Hashable, NoReturn, Optional
+from requests import Response
+from requests_api.constants import GET, HEAD
+from requests_api.retry import RetryStats
+
+
+# methods hedged, sending them twice is harmless
+HEDGED_METHODS = (GET, HEAD)
+
+
+def run_hedged(send: Callable[[], Response], delay: float, allow: Callable[[], bool]) -> tuple:
+    """
+    Runs ``send`` in a thread, and once more in a second thread if no response arrived after ``delay``.
+
+    The first response is returned. The other attempt cannot be interrupted while it waits for its
+    response, its response is closed (with its connection) as soon as it arrives. A failed attempt
+    leaves the other one to answer; when both fail, the error of the last one is raised.
+
+    :param send: Sends one attempt.
+    :param delay: Seconds to wait for the first attempt before hedging it.
+    :param allow: Called once the delay elapsed, whether a second attempt may be sent.
+    :return: ``(response, hedged, hedge_won)``.
+    """
+    results = queue.SimpleQueue()
+    lock = threading.Lock()
+    decided = False
+
+    def attempt(index: int) -> NoReturn:
+        try:
+            outcome = (index, send(), None)
+        except Exception as error:
+            outcome = (index, None, error)
+        with lock:
+            late = decided
+            if not late:
+                results.put(outcome)
+        if late and outcome[1] is not None:
+            outcome[1].close()
+
+    threading.Thread(target=attempt, args=(0,), daemon=True).start()
+    hedged = False
+    try:
+        index, response, error = results.get(timeout=delay)
+    except queue.Empty:
+        hedged = allow()
+        if hedged:
+            threading.Thread(target=attempt, args=(1,), daemon=True).start()
+        index, response, error = results.get()
+
+    if error is not None and hedged:
+        index, response, error = results.get()
+
+    # an attempt completing meanwhile is closed by its thread from now on,
+    # one that completed before is still queued
+    with lock:
+        decided = True
+    while not results.empty():
+        late = results.get()[1]
+        if late is not None:
+            late.close()
+
+    if error is not None:
+        raise error
+    return response, hedged, 1 == index
+
+
+class HedgePolicy:
+    """
+    Sends a second, identical ``GET`` / ``HEAD`` request when the first is slower than usual (hedging).
+
+    A request that has not received its response headers after ``delay`` seconds (by default the
+    ``quantile`` of the recent latencies of its host and path, once ``min_samples`` are known) is
+    sent again over another pooled connection, and whichever response arrives first is used. The
+    slower attempt cannot be interrupted midway, so it holds its connection (and a thread) until
+    its response headers arrive or its timeout expires, and is then closed.
+
+    Hedges are limited to ``max_ratio`` of the attempts sent to a host within ``window`` seconds,
+    so a backend slowed down by load is never sent much more traffic. Every request is sent from a
+    thread of its own while a delay is known, which costs a thread start per call.
+
+    :param delay: Fixed delay in seconds, ``None`` to use the observed ``quantile``.
+    :param quantile: Quantile of the observed latencies used as delay.
+    :param min_delay: Lower bound of the observed delay.
+    :param max_delay: Upper bound of the observed delay, ``None`` for none.
+    :param min_samples: Latencies observed for a path before it is hedged with the observed delay.
+    :param samples: Recent latencies kept per path.
+    :param max_ratio: Maximum share of hedges among the attempts sent to a host.
+    :param window: Seconds over which the share of hedges is measured.
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        quantile: float = 0.95,
+        min_delay: float = 0.005,
+        max_delay: Optional[float] = None,
+        min_samples: int = 20,
+        samples: int = 200,
+        max_ratio: float = 0.1,
+        window: int = 60
+    ) -> NoReturn:
+        """ initialize class """
+        self.fixed_delay = delay
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.samples = samples
+        self.max_ratio = max_ratio
+        # hedges are counted among the attempts to a host, like retries
+        self.stats = RetryStats(window)
+        self.latencies = {}
+        self.delays = {}
+        self.wins = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> NoReturn:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def after_fork(self) -> NoReturn:
+        """ replaces the locks, which a thread of the parent process may have held when it forked """
+        self.lock = threading.Lock()
+        self.stats.after_fork()
+
+    def delay(self, key: Hashable) -> Optional[float]:
+        """ seconds after which a request to ``key`` is hedged, ``None`` while too few latencies are known """
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        return self.delays.get(key)
+
+    def observe(self, key: Hashable, seconds: float) -> NoReturn:
+        """ records the latency of an attempt, updating the delay of ``key`` every few samples """
+        with self.lock:
+            latencies = self.latencies.get(key)
+            if latencies is None:
+                latencies = self.latencies[key] = deque(maxlen=self.samples)
+            latencies.append(seconds)
+            if len(latencies) < self.min_samples or len(latencies) % max(1, self.samples // 20):
+                return
+            ordered = sorted(latencies)
+
+        delay = max(self.min_delay, ordered[max(0, math.ceil(self.quantile * len(ordered)) - 1)])
+        self.delays[key] = delay if self.max_delay is None else min(self.max_delay, delay)
+
+    def record(self, host: str) -> NoReturn:
+        """ records a request sent to ``host`` """
+        self.stats.record(host, False)
+
+    def allow(self, host: str) -> bool:
+        """ whether a request to ``host`` may be hedged within the budget, recording the hedge if so """
+        with self.lock:
+            attempts, hedges = self.stats.totals(host)
+            if hedges + 1 > self.max_ratio * (attempts + 1):
+                return False
+            self.stats.record(host, True)
+        return True
+
+    def won(self, host: str) -> NoReturn:
+        """ records a hedge answering before the request it hedged """
+        with self.lock:
+            self.wins[host] = self.wins.get(host, 0) + 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns the hedging activity of every host.
+
+        :return: ``{host: {"attempts", "hedges", "ratio", "wins"}}``, attempts and hedges within the
+            window, wins since the policy was created.
+        """
+        snapshot = {}
+        for host, stats in self.stats.snapshot().items():
+            snapshot[host] = {
+                "attempts": stats["attempts"],
+                "hedges": stats["retries"],
+                "ratio": stats["ratio"],
+                "wins": self.wins.get(host, 0)
+            }
+        return snapshot
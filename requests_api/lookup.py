@@ -0,0 +1,209 @@
+import re
+
+from typing import Any, BinaryIO, NoReturn, Optional, Union
+from requests_api.errors import ConfigurationError, RequestError
+
+
+# path segments: ``name``, ``*``, ``[0]`` or ``[*]``
+PATH_TOKEN = re.compile(r"\.?([^.\[\]]+)|\[(\d+|\*)\]")
+
+# compiled wildcards for every value of an object / every item of an array
+ANY_KEY = "*"
+ANY_ITEM = "[*]"
+
+
+class KeyPath:
+    """
+    Precompiled dotted / JSONPath-like path, e.g. ``items[*].id`` or ``$.data.users[0].name``.
+
+    Unlike plain search keys, which are searched for at any depth, a ``KeyPath`` is resolved
+    from the root of the document and only visits the branches it names. ``*`` matches every
+    value of an object and ``[*]`` every item of an array.
+    """
+
+    def __init__(self, expression: str) -> NoReturn:
+        """ initialize class """
+        self.expression = expression
+        self.steps = self.compile(expression)
+
+    def __repr__(self) -> str:
+        return f"KeyPath({self.expression!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, KeyPath) and other.expression == self.expression
+
+    def __hash__(self) -> int:
+        return hash((KeyPath, self.expression))
+
+    @staticmethod
+    def compile(expression: str) -> tuple:
+        """ parses the expression into object keys (``str``), array indexes (``int``) and wildcards """
+        path = expression[1:] if expression.startswith("$") else expression
+        steps, position = [], 0
+        for match in PATH_TOKEN.finditer(path):
+            if match.start() != position:
+                break
+            key, index = match.groups()
+            if key is not None:
+                steps.append(key)
+            else:
+                steps.append(ANY_ITEM if index == "*" else int(index))
+            position = match.end()
+        if position != len(path) or not steps:
+            raise ConfigurationError(f"Invalid key path '{expression}'.")
+        return tuple(steps)
+
+    @property
+    def prefix(self) -> Optional[str]:
+        """ equivalent ``ijson`` prefix, ``None`` when the path uses indexes or ``*`` """
+        if any(isinstance(step, int) or step == ANY_KEY for step in self.steps):
+            return None
+        return ".".join("item" if step == ANY_ITEM else step for step in self.steps)
+
+    def resolve(self, document: Any) -> list:
+        """ returns every value found at the path, in document order """
+        nodes = [document]
+        for step in self.steps:
+            found = []
+            for node in nodes:
+                if step == ANY_ITEM:
+                    if isinstance(node, list):
+                        found.extend(node)
+                elif step == ANY_KEY:
+                    if isinstance(node, dict):
+                        found.extend(node.values())
+                elif isinstance(step, int):
+                    if isinstance(node, list) and step < len(node):
+                        found.append(node[step])
+                elif isinstance(node, dict) and step in node:
+                    found.append(node[step])
+            nodes = found
+        return nodes
+
+
+def compile_path(expression: str) -> KeyPath:
+    """
+    Compiles a dotted / JSONPath-like expression for use in ``search_keys``.
+
+    :param expression: Path such as ``items[*].id``, an optional leading ``$`` is ignored.
+    :return: ``KeyPath`` object.
+    """
+    return KeyPath(expression)
+
+
+def nested_lookup_many(search_keys: list, document: Any) -> dict:
+    """
+    Finds every search key in a single walk of the document.
+
+    Plain keys are searched for at any depth, with the same results (and ordering) as calling
+    ``nested_lookup`` once per key. ``KeyPath`` entries are resolved from the root directly.
+
+    :param search_keys: Keys (``str``) and/or compiled paths (``KeyPath``).
+    :param document: Decoded JSON document.
+    :return: Dictionary of matched values per search key.
+    """
+    results = {}
+    keys = set()
+    for key in search_keys:
+        if isinstance(key, KeyPath):
+            results[key] = key.resolve(document)
+        else:
+            results[key] = []
+            keys.add(key)
+
+    def walk(node: Union[dict, list]) -> NoReturn:
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in keys:
+                    results[key].append(value)
+                if isinstance(value, (dict, list)):
+                    walk(value)
+        else:
+            for value in node:
+                if isinstance(value, (dict, list)):
+                    walk(value)
+
+    if keys and isinstance(document, (dict, list)):
+        walk(document)
+    return results
+
+
+def lookup(search_keys: list, document: Any) -> list:
+    """
+    Flattens the ``nested_lookup_many`` results in ``search_keys`` order.
+
+    :param search_keys: Keys (``str``) and/or compiled paths (``KeyPath``).
+    :param document: Decoded JSON document.
+    :return: Flattened list of matched values.
+    """
+    results = nested_lookup_many(search_keys, document)
+    return [item for key in search_keys for item in results[key]]
+
+
+def stream_lookup(search_keys: list, stream: BinaryIO, chunk_size: int = 65536) -> list:
+    """
+    Extracts every value stored under ``search_keys`` from a JSON byte stream in a single pass.
+
+    Only the matched values are ever built in memory, the rest of the document is discarded as
+    it is parsed. Results are identical to ``lookup`` over the decoded document. ``KeyPath``
+    entries may use ``[*]`` but not array indexes or ``*``.
+
+    :param search_keys: Keys (``str``) and/or compiled paths (``KeyPath``).
+    :param stream: File-like object returning the (decompressed) JSON document.
+    :param chunk_size: Number of bytes read from the stream at a time.
+    :return: Flattened list of matched values.
+    """
+    try:
+        import ijson
+    except ImportError:
+        raise ConfigurationError("Streaming search requires 'ijson', install with 'requests-api[stream]'.")
+
+    results = {key: [] for key in search_keys}
+    keys = {key for key in results if not isinstance(key, KeyPath)}
+    prefixes = {}
+    for key in results:
+        if isinstance(key, KeyPath):
+            if key.prefix is None:
+                raise ConfigurationError(f"Key path '{key.expression}' cannot be searched while streaming.")
+            prefixes.setdefault(key.prefix, []).append(results[key])
+
+    # values under construction: [results list, index into results, builder, depth]
+    building = []
+    matched = []
+
+    events = ijson.parse(stream, buf_size=chunk_size, use_float=True)
+    try:
+        for prefix, event, value in events:
+
+            # a value starts with any event but a key or a closing bracket
+            if prefixes and event not in ("map_key", "end_map", "end_array"):
+                matched.extend(prefixes.get(prefix, ()))
+
+            # containers get a placeholder so results stay in document order
+            for found in matched:
+                if event in ("start_map", "start_array"):
+                    found.append(None)
+                    building.append([found, len(found) - 1, ijson.ObjectBuilder(), 0])
+                else:
+                    found.append(value)
+            matched = []
+
+            for entry in building:
+                entry[2].event(event, value)
+                if event in ("start_map", "start_array"):
+                    entry[3] += 1
+                elif event in ("end_map", "end_array"):
+                    entry[3] -= 1
+
+            # the innermost value is always the first one to complete
+            while building and building[-1][3] == 0:
+                found, index, builder, _ = building.pop()
+                found[index] = builder.value
+
+            # the event following a matched ``map_key`` is the start of its value
+            if event == "map_key" and value in keys:
+                matched.append(results[value])
+    except ijson.JSONError as exception:
+        raise RequestError(f"Unable to search response, body is not valid JSON: {exception}")
+
+    return [item for key in search_keys for item in results[key]]
@@ -0,0 +1,272 @@
+import re
+import threading
+import time
+
+from bisect import bisect_left
+from typing import NoReturn
+
+
+# latency histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# path segments replaced by ``{id}`` in the default path template
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{32,36}|[0-9a-fA-F]{24})$")
+
+
+def path_template(path: str) -> str:
+    """ replaces numeric, UUID and object ID path segments with ``{id}`` to bound label cardinality """
+    return "/".join("{id}" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+class RequestRecord:
+    """
+    Measurements of a single call to ``Requests.request``.
+
+    ``phases`` holds the seconds spent in each phase: ``cache`` (cache lookup), ``send``
+    (connection, TLS, auth handshakes, rate limiting, retries and server time, up to the response
+    headers), ``server`` (time to the response headers of the last attempt), ``download`` (body),
+    ``decode`` (JSON decoding), ``lookup`` (``search_keys`` extraction) and ``total``.
+    """
+    __slots__ = (
+        "method",
+        "path",
+        "started",
+        "phases",
+        "status_code",
+        "bytes_out",
+        "bytes_in",
+        "new_connection",
+        "retries",
+        "cache",
+        "error"
+    )
+
+    def __init__(self, method: str, path: str) -> NoReturn:
+        """ initialize class """
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.status_code = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.new_connection = None
+        self.retries = 0
+        self.cache = None
+        self.error = None
+
+    def __repr__(self) -> str:
+        return (f"RequestRecord({self.method} {self.path} status={self.status_code} "
+                f"phases={self.phases} error={self.error})")
+
+
+class MetricsCollector:
+    """
+    Base collector, override the hooks to export measurements.
+
+    ``pre_request`` runs before a request is sent and ``post_request`` once it completed (or
+    failed), both with the ``RequestRecord`` of the call. ``increment`` receives event counters
+    such as coalesced calls or hedged requests.
+    """
+
+    def path_template(self, path: str) -> str:
+        """ path label of a request """
+        return path_template(path)
+
+    def pre_request(self, record: RequestRecord) -> NoReturn:
+        """ called before the request is sent """
+
+    def post_request(self, record: RequestRecord) -> NoReturn:
+        """ called once the request completed or failed """
+
+    def increment(self, name: str, value: int = 1, **tags) -> NoReturn:
+        """ called for event counters """
+
+    def after_fork(self) -> NoReturn:
+        """ called in the child process after a fork, to replace locks held by threads of the parent """
+
+
+class Histogram:
+    """ cumulative histogram with fixed bucket boundaries """
+
+    def __init__(self, buckets: tuple) -> NoReturn:
+        """ initialize class """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> NoReturn:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """ estimates the ``q`` quantile, as the upper bound of the bucket it falls in """
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank and count:
+                return bound
+        return 0.0
+
+
+class HistogramAggregator(MetricsCollector):
+    """
+    In-process aggregator of request counts, bytes, connection reuse, retries and per-phase latency
+    histograms, labelled by method and path template.
+
+    :param buckets: Latency histogram bucket boundaries in seconds.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> NoReturn:
+        """ initialize class """
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self) -> dict:
+        return {"buckets": self.buckets}
+
+    def __setstate__(self, state: dict) -> NoReturn:
+        self.__dict__.update(state)
+        self.after_fork()
+
+    def after_fork(self) -> NoReturn:
+        """ starts empty in a new process, so the measurements of the parent are not counted twice """
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> NoReturn:
+        """ clears every measurement """
+        with self.lock:
+            self.requests = {}
+            self.histograms = {}
+            self.counters = {}
+
+    def post_request(self, record: RequestRecord) -> NoReturn:
+        labels = (record.method, record.path)
+        with self.lock:
+            stats = self.requests.get(labels + (record.status_code,))
+            if stats is None:
+                stats = self.requests[labels + (record.status_code,)] = {
+                    "count": 0,
+                    "errors": 0,
+                    "bytes_out": 0,
+                    "bytes_in": 0,
+                    "new_connections": 0,
+                    "reused_connections": 0,
+                    "retries": 0,
+                    "cache_hits": 0
+                }
+            stats["count"] += 1
+            stats["errors"] += record.error is not None
+            stats["bytes_out"] += record.bytes_out
+            stats["bytes_in"] += record.bytes_in
+            stats["new_connections"] += record.new_connection is True
+            stats["reused_connections"] += record.new_connection is False
+            stats["retries"] += record.retries
+            stats["cache_hits"] += record.cache == "hit"
+
+            for phase, seconds in record.phases.items():
+                histogram = self.histograms.get(labels + (phase,))
+                if histogram is None:
+                    histogram = self.histograms[labels + (phase,)] = Histogram(self.buckets)
+                histogram.observe(seconds)
+
+    def increment(self, name: str, value: int = 1, **tags) -> NoReturn:
+        key = (name, tuple(sorted(tags.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        """
+        Returns the aggregated measurements.
+
+        :return: ``{"requests": [...], "latency": [...], "counters": [...]}`` with one dictionary
+            per label set, latencies include count, sum, p50, p95 and p99 estimates.
+        """
+        with self.lock:
+            return {
+                "requests": [
+                    {"method": method, "path": path, "status_code": status_code, **stats}
+                    for (method, path, status_code), stats in self.requests.items()
+                ],
+                "latency": [
+                    {
+                        "method": method,
+                        "path": path,
+                        "phase": phase,
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "p50": histogram.quantile(0.5),
+                        "p95": histogram.quantile(0.95),
+                        "p99": histogram.quantile(0.99)
+                    }
+                    for (method, path, phase), histogram in self.histograms.items()
+                ],
+                "counters": [
+                    {"name": name, "tags": dict(tags), "value": value}
+                    for (name, tags), value in self.counters.items()
+                ]
+            }
+
+    def to_prometheus(self, prefix: str = "requests_api") -> str:
+        """
+        Renders the measurements in the Prometheus text exposition format.
+
+        :param prefix: Metric name prefix.
+        :return: Exposition text.
+        """
+        lines = []
+        with self.lock:
+            requests = list(self.requests.items())
+            histograms = [(labels, histogram.counts[:], histogram.sum, histogram.count)
+                          for labels, histogram in self.histograms.items()]
+            counters = list(self.counters.items())
+
+        for name, field, kind in (
+            ("requests_total", "count", "counter"),
+            ("request_errors_total", "errors", "counter"),
+            ("request_bytes_out_total", "bytes_out", "counter"),
+            ("request_bytes_in_total", "bytes_in", "counter"),
+            ("connections_new_total", "new_connections", "counter"),
+            ("connections_reused_total", "reused_connections", "counter"),
+            ("request_retries_total", "retries", "counter"),
+            ("cache_hits_total", "cache_hits", "counter")
+        ):
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for (method, path, status_code), stats in requests:
+                labels = format_labels(method=method, path=path, status_code=status_code)
+                lines.append(f"{prefix}_{name}{labels} {stats[field]}")
+
+        lines.append(f"# TYPE {prefix}_request_phase_seconds histogram")
+        for (method, path, phase), counts, total, count in histograms:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = format_labels(method=method, path=path, phase=phase, le=le)
+                lines.append(f"{prefix}_request_phase_seconds_bucket{labels} {cumulative}")
+            labels = format_labels(method=method, path=path, phase=phase)
+            lines.append(f"{prefix}_request_phase_seconds_sum{labels} {total}")
+            lines.append(f"{prefix}_request_phase_seconds_count{labels} {count}")
+
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for (counter, tags), value in counters:
+                if counter == name:
+                    lines.append(f"{prefix}_{name}_total{format_labels(**dict(tags))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value) -> str:
+    """ escapes a Prometheus label value """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(**labels) -> str:
+    """ renders Prometheus labels """
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + "}"
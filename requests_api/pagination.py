@@ -0,0 +1,184 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, NoReturn, Optional, Union
+from urllib.parse import urlsplit, parse_qsl
+from requests import Response
+from requests_api.lookup import KeyPath, lookup
+
+
+class Pagination:
+    """
+    Base pagination strategy.
+
+    Strategies compute the query parameters of each page. ``speculative`` strategies can compute
+    the next page without its predecessor's response, so several pages may be fetched ahead.
+    """
+    speculative = False
+
+    def first(self, path: str, query_params: dict) -> tuple:
+        """ returns the ``(path, query_params)`` of the first page """
+        return path, dict(query_params)
+
+    def next(self, path: str, query_params: dict, response: Optional[Response], body: Any, items: list) -> Optional[tuple]:
+        """ returns the ``(path, query_params)`` of the next page, ``None`` on the last page """
+        raise NotImplementedError
+
+    def is_last(self, items: list) -> bool:
+        """ whether a page ends the collection, used by speculative strategies """
+        return not items
+
+
+class LinkHeaderPagination(Pagination):
+    """
+    Follows the ``rel="next"`` URL of the ``Link`` response header (RFC 8288).
+
+    :param rel: Relation type of the next page link.
+    """
+
+    def __init__(self, rel: str = "next") -> NoReturn:
+        """ initialize class """
+        self.rel = rel
+
+    def next(self, path, query_params, response, body, items):
+        url = response.links.get(self.rel, {}).get("url")
+        if not url:
+            return None
+        parts = urlsplit(url)
+        return parts.path or path, dict(parse_qsl(parts.query, keep_blank_values=True))
+
+
+class CursorPagination(Pagination):
+    """
+    Sends the cursor found in the response body as a query parameter of the next page.
+
+    :param cursor_key: Key (searched for like ``search_keys``) or ``KeyPath`` of the next cursor.
+    :param cursor_param: Query parameter the cursor is sent as.
+    """
+
+    def __init__(self, cursor_key: Union[str, KeyPath] = "next", cursor_param: str = "cursor") -> NoReturn:
+        """ initialize class """
+        self.cursor_key = cursor_key
+        self.cursor_param = cursor_param
+
+    def next(self, path, query_params, response, body, items):
+        cursors = [cursor for cursor in lookup([self.cursor_key], body) if cursor not in (None, "")]
+        if not cursors or not items:
+            return None
+        return path, {**query_params, self.cursor_param: cursors[0]}
+
+
+class OffsetPagination(Pagination):
+    """
+    Pages through ``offset`` / ``limit`` query parameters until a page comes back short.
+
+    :param limit: Number of items per page.
+    :param limit_param: Query parameter holding the page size.
+    :param offset_param: Query parameter holding the offset of the page.
+    :param start: Offset of the first page.
+    """
+    speculative = True
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_param: str = "limit",
+        offset_param: str = "offset",
+        start: int = 0
+    ) -> NoReturn:
+        """ initialize class """
+        self.limit = limit
+        self.limit_param = limit_param
+        self.offset_param = offset_param
+        self.start = start
+
+    def first(self, path, query_params):
+        return path, {**query_params, self.limit_param: self.limit, self.offset_param: self.start}
+
+    def next(self, path, query_params, response, body, items):
+        return path, {**query_params, self.offset_param: int(query_params[self.offset_param]) + self.limit}
+
+    def is_last(self, items):
+        return len(items) < self.limit
+
+
+def page_items(body: Any, items_key: Optional[Union[str, KeyPath]] = None) -> list:
+    """
+    Extracts the items of a page.
+
+    :param body: Decoded page.
+    :param items_key: Key (searched for like ``search_keys``) or ``KeyPath`` of the items, the
+        page itself when omitted.
+    :return: Items of the page, lists found under ``items_key`` are flattened.
+    """
+    if items_key is None:
+        values = [body]
+    else:
+        values = lookup([items_key], body) if isinstance(body, (dict, list)) else []
+    return [item for value in values for item in (value if isinstance(value, list) else [value])]
+
+
+def paginate(
+    fetch: Callable[[str, dict], tuple],
+    pagination: Pagination,
+    path: str,
+    query_params: dict,
+    items_key: Optional[Union[str, KeyPath]] = None,
+    max_pages: Optional[int] = None,
+    max_in_flight: int = 1
+) -> Iterator[Any]:
+    """
+    Yields the items of every page, fetching the following pages in the background.
+
+    :param fetch: Callable returning the ``(response, decoded body)`` of ``(path, query_params)``.
+    :param pagination: Pagination strategy.
+    :param path: Path of the first page.
+    :param query_params: Query parameters of the first page.
+    :param items_key: Key or ``KeyPath`` of the items in each page.
+    :param max_pages: Maximum number of pages fetched.
+    :param max_in_flight: Maximum number of pages fetched ahead of the one being consumed.
+    :return: Iterator of items, only the pages in flight are held in memory.
+    """
+    max_in_flight = max(1, max_in_flight)
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    pending = deque()
+    submitted = 0
+
+    def submit(page: Optional[tuple]) -> bool:
+        nonlocal submitted
+        if page is None or (max_pages is not None and submitted >= max_pages):
+            return False
+        pending.append((page, executor.submit(fetch, *page)))
+        submitted += 1
+        return True
+
+    def fill(page: tuple) -> NoReturn:
+        while len(pending) < max_in_flight and submit(pagination.next(*page, None, None, None)):
+            page = pending[-1][0]
+
+    try:
+        submit(pagination.first(path, query_params))
+        if pagination.speculative:
+            fill(pending[-1][0])
+
+        while pending:
+            page, future = pending.popleft()
+            response, body = future.result()
+            items = page_items(body, items_key)
+
+            # queue the next page(s) before handing out the items of this one
+            if pagination.speculative:
+                if pagination.is_last(items):
+                    while pending:
+                        pending.pop()[1].cancel()
+                elif pending:
+                    fill(pending[-1][0])
+                else:
+                    fill(page)
+            else:
+                submit(pagination.next(*page, response, body, items))
+
+            yield from items
+    finally:
+        while pending:
+            pending.pop()[1].cancel()
+        executor.shutdown(wait=False)
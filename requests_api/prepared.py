@@ -0,0 +1,229 @@
+import os
+import string
+import time
+
+from typing import TYPE_CHECKING, Any, NoReturn, Optional, Union
+from urllib.parse import quote, urlencode
+from requests import PreparedRequest, Session
+from requests.auth import HTTPBasicAuth
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_netrc_auth, requote_uri
+from requests_api.constants import HEAD, STATUS_CODES
+from requests_api.errors import ConfigurationError, RequestError
+from requests_api.metrics import RequestRecord
+
+if TYPE_CHECKING:
+    from requests_api.core import Requests
+    from requests_api.stream import StreamedResponse
+
+
+# keyword arguments of a call, which path variables cannot be named after
+CALL_OPTIONS = ("request_data", "query_params", "deadline", "headers")
+
+
+def compile_template(path_template: str) -> tuple:
+    """
+    Compiles a path template such as ``/users/{id}/posts`` into a format string and its variables.
+
+    The literal parts are percent-encoded here, once; the values filled in are percent-encoded as
+    a whole, so a ``/`` in a value cannot add a path segment.
+
+    :param path_template: Path with ``{name}`` placeholders.
+    :return: ``(format string, variable names)``.
+    """
+    try:
+        parsed = list(string.Formatter().parse(path_template))
+    except ValueError as error:
+        raise ConfigurationError(f"Invalid path template '{path_template}': {error}.")
+
+    pieces, variables = [], []
+    for literal, name, spec, conversion in parsed:
+        pieces.append(requote_uri(literal).replace("{", "{{").replace("}", "}}"))
+        if name is None:
+            continue
+        if not name.isidentifier() or spec or conversion:
+            raise ConfigurationError(f"Invalid variable '{{{name}}}' in path template '{path_template}'.")
+        if name in CALL_OPTIONS:
+            raise ConfigurationError(f"Path variable '{name}' clashes with an option of the call.")
+        pieces.append(f"{{{name}}}")
+        if name not in variables:
+            variables.append(name)
+
+    format_string = "".join(pieces)
+    if not format_string.startswith("/"):
+        format_string = "/" + format_string
+    return format_string, tuple(variables)
+
+
+class PreparedEndpoint:
+    """
+    Request to one endpoint, with everything that does not change between calls worked out once.
+
+    Returned by ``Requests.prepare``. The path template is compiled, the headers of the session
+    and the endpoint are merged, basic (or ``.netrc``) credentials are encoded, the proxy and CA
+    bundle environment variables are read and the expected status codes are resolved up front. A
+    call only fills in the path variables, builds the request from these parts and sends it
+    through the pipeline of the client (cache, single-flight, retries, circuit breaker, rate
+    limiter and metrics), skipping the per-call preparation ``requests`` does for ``Session.get``.
+
+    The environment (proxies, ``REQUESTS_CA_BUNDLE``) is read when the endpoint is prepared. Auth
+    schemes with per-request state (digest, OAuth2, NTLM, Kerberos) are still applied on every
+    call. Safe to share between threads.
+
+    :param client: Client the requests are sent with.
+    :param http_method: ``"GET"``, ``"HEAD"``, ``"POST"``, ``"PUT"``, ``"DELETE"`` or ``"PATCH"``.
+    :param path_template: Path with ``{name}`` placeholders, filled in by the keyword arguments of a call.
+    :param query_params: Query parameters of every call.
+    :param search_keys: Keys searched for in every decoded response.
+    :param status_codes: Expected status codes, those of ``http_method`` by default.
+    :param stream: Return a ``StreamedResponse`` instead of the decoded body.
+    :param timeout: (connect, read) timeouts, those of the client by default.
+    :param headers: Headers merged over the headers of the client.
+    """
+
+    def __init__(
+        self,
+        client: "Requests",
+        http_method: str,
+        path_template: str,
+        query_params: Optional[dict] = None,
+        search_keys: Optional[list] = None,
+        status_codes: Optional[list] = None,
+        stream: Optional[bool] = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        headers: Optional[dict] = None
+    ) -> NoReturn:
+        """ initialize class """
+        if http_method not in STATUS_CODES:
+            raise ConfigurationError(f"HTTP method type '{http_method}' is not supported.")
+        self.client = client
+        self.http_method = http_method
+        self.path_template = path_template
+        self.format, self.variables = compile_template(path_template)
+        self.query = urlencode(query_params or {})
+        self.search_keys = search_keys
+        self.status_codes = client.expected_status_code(http_method) if status_codes is None else status_codes
+        self.stream = stream
+        self.timeout = client.timeout if timeout is None else timeout
+        self.prefix = f"{client.schema}://{client.baseurl}"
+        self.allow_redirects = HEAD != http_method
+
+        # label of the metrics of every call, the template being the path with its ids replaced
+        self.label = client.metrics.path_template(path_template) if client.metrics is not None else path_template
+
+        session = client.session
+        self.headers = CaseInsensitiveDict(session.headers)
+        self.headers.update(headers or {})
+        for name in [name for name, value in self.headers.items() if value is None]:
+            del self.headers[name]
+
+        # basic credentials are the same on every request, other schemes keep
+        # per-request state (nonces, tokens, handshakes) and are applied per call
+        auth = client.auth
+        if auth is None and session.trust_env:
+            auth = get_netrc_auth(self.prefix)
+        if isinstance(auth, tuple):
+            auth = HTTPBasicAuth(*auth)
+        if isinstance(auth, HTTPBasicAuth):
+            request = PreparedRequest()
+            request.headers = self.headers
+            auth(request)
+            auth = None
+        self.auth = auth
+
+        # proxies, CA bundle and client certificate, as ``Session.request`` resolves them
+        settings = session.merge_environment_settings(self.prefix + "/", {}, None, client.verify, None)
+        self.settings = {"proxies": settings["proxies"], "verify": settings["verify"], "cert": settings["cert"]}
+
+    def __repr__(self) -> str:
+        return f"PreparedEndpoint({self.http_method} {self.prefix}{self.path_template})"
+
+    def __call__(
+        self,
+        request_data: Optional[Any] = None,
+        query_params: Optional[dict] = None,
+        deadline: Optional[float] = None,
+        headers: Optional[dict] = None,
+        **variables
+    ) -> Union[bool, str, dict, list, "StreamedResponse"]:
+        """
+        Sends the request, filling the path template in with ``variables``.
+
+        :param request_data: Body of ``POST``, ``PUT`` and ``PATCH`` requests.
+        :param query_params: Query parameters added to those of the endpoint.
+        :param deadline: Seconds the call may take.
+        :param headers: Headers merged over the headers of the endpoint for this call only.
+        :return: Decoded response, ``True`` for an empty body, or ``StreamedResponse``.
+        """
+        path = self.render(variables)
+        client = self.client
+        if client.pid != os.getpid():
+            client.after_fork()
+
+        if client.metrics is None:
+            return client.perform(
+                self.http_method, path, query_params, request_data, self.search_keys, self.status_codes, self.stream,
+                self.timeout, deadline, headers, None, self
+            )
+
+        record = RequestRecord(self.http_method, self.label)
+        client.metrics.pre_request(record)
+        try:
+            return client.perform(
+                self.http_method, path, query_params, request_data, self.search_keys, self.status_codes, self.stream,
+                self.timeout, deadline, headers, record, self
+            )
+        except RequestError as error:
+            record.error = error
+            record.status_code = record.status_code or error.http_errno
+            raise
+        finally:
+            record.phases["total"] = time.perf_counter() - record.started
+            client.metrics.post_request(record)
+
+    def render(self, variables: dict) -> str:
+        """ fills the path template in, percent-encoding every value """
+        if len(variables) != len(self.variables) or not all(name in variables for name in self.variables):
+            missing = [name for name in self.variables if name not in variables]
+            unexpected = [name for name in variables if name not in self.variables]
+            raise ConfigurationError(f"Path template '{self.path_template}' takes the variables "
+                                     f"{list(self.variables)}, missing {missing}, unexpected {unexpected}.")
+        return self.format.format_map({name: quote(str(variables[name]), safe="") for name in self.variables})
+
+    def encode_url(self, path: str, query_params: Optional[dict] = None) -> str:
+        """ url of a rendered path, the query parameters of the call appended to those of the endpoint """
+        query = self.query
+        if query_params:
+            query = f"{query}&{urlencode(query_params)}" if query else urlencode(query_params)
+        return f"{self.prefix}{path}?{query}" if query else f"{self.prefix}{path}"
+
+    def prepare_request(
+        self,
+        session: Session,
+        encoded_url: str,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None,
+        hooks: Optional[dict] = None
+    ) -> PreparedRequest:
+        """ builds the request of one attempt from the parts prepared up front """
+        request = PreparedRequest()
+        request.method = self.http_method
+        request.url = encoded_url
+        request.headers = self.headers.copy()
+        if headers:
+            for name, value in headers.items():
+                if value is None:
+                    request.headers.pop(name, None)
+                else:
+                    request.headers[name] = value
+
+        # the cookie jar is needed by redirects, the header only once it holds cookies
+        request._cookies = session.cookies
+        if session.cookies:
+            request.prepare_cookies(session.cookies)
+        request.prepare_body(data, None)
+        if self.auth is not None:
+            request.prepare_auth(self.auth)
+        if hooks:
+            request.prepare_hooks(hooks)
+        return request
@@ -0,0 +1,224 @@
+import threading
+import time
+
+from contextlib import suppress
+from typing import NoReturn, Optional
+from requests_api.errors import DeadlineExceeded
+from requests_api.retry import parse_retry_after
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, callers sleep on a condition until a token is available.
+
+    :param rate: Tokens added per second.
+    :param capacity: Maximum number of tokens (burst size), defaults to ``rate``.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> NoReturn:
+        """ initialize class """
+        self.rate = self.configured_rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+
+    def refill(self, now: float) -> NoReturn:
+        """ adds the tokens earned since the last refill """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, expires: Optional[float] = None) -> bool:
+        """
+        Takes one token, waiting for it if needed.
+
+        :param expires: ``time.monotonic()`` after which to stop waiting.
+        :return: ``False`` if no token became available before ``expires``.
+        """
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self.refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate if self.rate > 0 else 1.0)
+                if expires is not None:
+                    if now >= expires:
+                        return False
+                    wait = min(wait, expires - now)
+                self.condition.wait(wait)
+
+    def pause(self, seconds: float) -> NoReturn:
+        """ stops handing out tokens for ``seconds`` (e.g. after ``Retry-After``) """
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def set_rate(self, rate: float) -> NoReturn:
+        """ changes the refill rate, never above the configured rate """
+        with self.condition:
+            self.refill(time.monotonic())
+            self.rate = max(0.0, min(self.configured_rate, rate))
+            self.condition.notify_all()
+
+
+class Limit:
+    """
+    Limits applied to a host or a path prefix.
+
+    :param rate: Requests per second, ``None`` for no rate limit.
+    :param burst: Requests that may be sent at once before ``rate`` applies, defaults to ``rate``.
+    :param max_in_flight: Maximum concurrent requests, ``None`` for no limit.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_in_flight: Optional[int] = None
+    ) -> NoReturn:
+        """ initialize class """
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+
+
+class Governor:
+    """ runtime state (token bucket, semaphore) of a ``Limit`` for one host and prefix """
+
+    def __init__(self, limit: Limit) -> NoReturn:
+        """ initialize class """
+        self.bucket = TokenBucket(limit.rate, limit.burst) if limit.rate else None
+        self.semaphore = threading.BoundedSemaphore(limit.max_in_flight) if limit.max_in_flight else None
+
+    def acquire(self, expires: Optional[float] = None) -> bool:
+        if self.semaphore is not None:
+            timeout = None if expires is None else max(0.0, expires - time.monotonic())
+            if not self.semaphore.acquire(timeout=timeout):
+                return False
+        if self.bucket is not None and not self.bucket.acquire(expires):
+            self.release()
+            return False
+        return True
+
+    def release(self) -> NoReturn:
+        if self.semaphore is not None:
+            self.semaphore.release()
+
+
+class Permit:
+    """ concurrency slots held by a request, released once its response headers arrived """
+
+    def __init__(self, governors: list) -> NoReturn:
+        """ initialize class """
+        self.governors = governors
+
+    def __enter__(self) -> "Permit":
+        return self
+
+    def __exit__(self, *exc_info) -> NoReturn:
+        self.release()
+
+    def release(self) -> NoReturn:
+        while self.governors:
+            self.governors.pop().release()
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter and concurrency governor, safe to share between threads and clients.
+
+    ``limits`` maps path prefixes to ``Limit`` objects, ``""`` applying to the whole host. Every
+    matching prefix applies, so a request to ``/search/users`` waits for both the ``""`` and the
+    ``/search`` limits. Each host gets its own buckets and semaphores. Rates adapt to the
+    ``X-RateLimit-Remaining`` / ``X-RateLimit-Reset`` and ``Retry-After`` response headers.
+
+    :param limits: Path prefix to ``Limit`` mapping.
+    :param adaptive: Adapt the rate to the response headers.
+    """
+
+    def __init__(self, limits: dict, adaptive: bool = True) -> NoReturn:
+        """ initialize class """
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]))
+        self.adaptive = adaptive
+        self.governors = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state["governors"], state["lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> NoReturn:
+        self.__dict__.update(state)
+        self.after_fork()
+
+    def after_fork(self) -> NoReturn:
+        """
+        Starts over with full buckets and free semaphores in a new process.
+
+        Permits held by threads of the parent process are never released in the child, and the
+        locks of the governors may have been held when it forked. Limits apply per process.
+        """
+        self.governors = {}
+        self.lock = threading.Lock()
+
+    def matching(self, host: str, path: str) -> list:
+        """ returns the governors applying to ``path`` on ``host``, least specific first """
+        governors = []
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                key = (host, prefix)
+                governor = self.governors.get(key)
+                if governor is None:
+                    with self.lock:
+                        governor = self.governors.setdefault(key, Governor(limit))
+                governors.append(governor)
+        return governors
+
+    def acquire(self, host: str, path: str, expires: Optional[float] = None) -> Permit:
+        """
+        Waits until a request to ``path`` may be sent.
+
+        :param host: Host the request is sent to.
+        :param path: Path of the request.
+        :param expires: ``time.monotonic()`` after which to stop waiting.
+        :return: ``Permit`` to release once the response headers arrived.
+        """
+        permit = Permit([])
+        for governor in self.matching(host, path):
+            if not governor.acquire(expires):
+                permit.release()
+                raise DeadlineExceeded(f"Deadline exceeded while waiting for the rate limit of '{host}{path}'.")
+            permit.governors.append(governor)
+        return permit
+
+    def update(self, host: str, path: str, status_code: int, headers: dict) -> NoReturn:
+        """ adapts the rates applying to ``path`` to the rate limit headers of a response """
+        if not self.adaptive:
+            return
+        buckets = [governor.bucket for governor in self.matching(host, path) if governor.bucket is not None]
+        if not buckets:
+            return
+
+        if status_code in (429, 503):
+            delay = parse_retry_after(headers.get("Retry-After"))
+            if delay is not None:
+                for bucket in buckets:
+                    bucket.pause(delay)
+
+        with suppress(KeyError, TypeError, ValueError):
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset = float(headers["X-RateLimit-Reset"])
+
+            # the reset is either delta seconds or an epoch timestamp
+            seconds = reset - time.time() if reset > 10 ** 9 else reset
+            for bucket in buckets:
+                if remaining <= 0:
+                    bucket.pause(max(0.0, seconds))
+                elif seconds > 0:
+                    bucket.set_rate(remaining / seconds)
+                else:
+                    bucket.set_rate(bucket.configured_rate)
@@ -0,0 +1,206 @@
+import random
+import threading
+import time
+
+from collections import deque
+from contextlib import suppress
+from email.utils import parsedate_to_datetime
+from typing import NoReturn, Optional
+from requests import ConnectionError, Timeout
+from requests_api.constants import GET, HEAD, PUT, DELETE
+from requests_api.errors import RequestError
+
+
+# methods retried by default, POST and PATCH must be opted in explicitly
+IDEMPOTENT_METHODS = (GET, HEAD, PUT, DELETE)
+
+# status codes retried by default
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# status codes for which the ``Retry-After`` header is honored
+RETRY_AFTER_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parses a ``Retry-After`` header.
+
+    :param value: Header value, either delay seconds or a HTTP date.
+    :param now: Current timestamp.
+    :return: Seconds to wait, ``None`` if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    with suppress(TypeError, ValueError, IndexError, OverflowError):
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (time.time() if now is None else now))
+    return None
+
+
+class RetryStats:
+    """
+    Per-host count of attempts and retries over a sliding window, kept in one-second buckets.
+
+    :param window: Length of the window in seconds.
+    """
+
+    def __init__(self, window: int = 60) -> NoReturn:
+        """ initialize class """
+        self.window = window
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> NoReturn:
+        self.__dict__.update(state)
+        self.after_fork()
+
+    def after_fork(self) -> NoReturn:
+        """ replaces the lock, which a thread of the parent process may have held when it forked """
+        self.lock = threading.Lock()
+
+    def record(self, host: str, retry: bool) -> NoReturn:
+        """ records an attempt sent to ``host`` """
+        second = int(time.monotonic())
+        with self.lock:
+            buckets = self.hosts.setdefault(host, deque())
+            if not buckets or buckets[-1][0] != second:
+                buckets.append([second, 0, 0])
+            buckets[-1][1] += 1
+            buckets[-1][2] += int(retry)
+            while buckets[0][0] <= second - self.window:
+                buckets.popleft()
+
+    def totals(self, host: str) -> tuple:
+        """ returns ``(attempts, retries)`` sent to ``host`` within the window """
+        oldest = int(time.monotonic()) - self.window
+        with self.lock:
+            buckets = [bucket for bucket in self.hosts.get(host, ()) if bucket[0] > oldest]
+        return sum(bucket[1] for bucket in buckets), sum(bucket[2] for bucket in buckets)
+
+    def snapshot(self) -> dict:
+        """ returns the attempts, retries and retry ratio of every host """
+        snapshot = {}
+        for host in list(self.hosts):
+            attempts, retries = self.totals(host)
+            snapshot[host] = {
+                "attempts": attempts,
+                "retries": retries,
+                "ratio": retries / attempts if attempts else 0.0
+            }
+        return snapshot
+
+
+class RetryPolicy:
+    """
+    Retries failed requests with exponential backoff and jitter.
+
+    A retry is only attempted when the method is allowed, the failure is a connection error, a
+    timeout or one of ``status_codes``, and the retry budget is not exhausted: at most ``total``
+    retries, within ``deadline`` seconds of the first attempt, and while retries make up less
+    than ``max_retry_ratio`` of the attempts sent to the host, so retries never amplify an outage.
+
+    :param total: Maximum number of retries per request.
+    :param backoff_factor: Base delay, the n-th retry waits up to ``backoff_factor * 2 ** n`` seconds.
+    :param backoff_max: Maximum delay between attempts.
+    :param jitter: Randomize delays over ``[0, delay]`` ("full jitter").
+    :param methods: Methods that may be retried, defaults to the idempotent ones.
+    :param status_codes: Status codes that may be retried.
+    :param respect_retry_after: Wait as long as ``Retry-After`` asks on 429/503 (the request
+        fails if it asks for more than ``backoff_max``).
+    :param deadline: Seconds after the first attempt past which no retry is started.
+    :param max_retry_ratio: Maximum share of retries among the attempts sent to a host.
+    :param min_attempts: Attempts to a host before ``max_retry_ratio`` is enforced.
+    :param window: Seconds over which the retry ratio is measured.
+    """
+
+    def __init__(
+        self,
+        total: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 30.0,
+        jitter: bool = True,
+        methods: tuple = IDEMPOTENT_METHODS,
+        status_codes: tuple = RETRY_STATUS_CODES,
+        respect_retry_after: bool = True,
+        deadline: Optional[float] = None,
+        max_retry_ratio: float = 0.2,
+        min_attempts: int = 10,
+        window: int = 60
+    ) -> NoReturn:
+        """ initialize class """
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.methods = tuple(method.upper() for method in methods)
+        self.status_codes = tuple(status_codes)
+        self.respect_retry_after = respect_retry_after
+        self.deadline = deadline
+        self.max_retry_ratio = max_retry_ratio
+        self.min_attempts = min_attempts
+        self.stats = RetryStats(window)
+
+    def is_retryable(self, http_method: str, error: RequestError) -> bool:
+        """ whether the failure is transient and the method safe to resend """
+        if http_method not in self.methods:
+            return False
+        if error.http_errno:
+            return error.http_errno in self.status_codes
+        return isinstance(error.message, (ConnectionError, Timeout))
+
+    def backoff(self, retry: int) -> float:
+        """ delay before the ``retry``-th retry (starting at 1) """
+        delay = min(self.backoff_max, self.backoff_factor * 2 ** (retry - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def retry_after(self, error: RequestError) -> Optional[float]:
+        """ delay requested by the server through ``Retry-After`` """
+        if not self.respect_retry_after or error.http_errno not in RETRY_AFTER_STATUS_CODES:
+            return None
+        if error.response is None:
+            return None
+        return parse_retry_after(error.response.headers.get("Retry-After"))
+
+    def within_budget(self, host: str) -> bool:
+        """ whether the share of retries sent to ``host`` is below ``max_retry_ratio`` """
+        attempts, retries = self.stats.totals(host)
+        return attempts < self.min_attempts or retries < attempts * self.max_retry_ratio
+
+    def next_delay(
+        self,
+        host: str,
+        http_method: str,
+        error: RequestError,
+        retry: int,
+        started: float
+    ) -> Optional[float]:
+        """
+        Decides whether a failed attempt is retried.
+
+        :param host: Host the request was sent to.
+        :param http_method: Upper-cased HTTP method.
+        :param error: Failure of the last attempt.
+        :param retry: Number of the upcoming retry (starting at 1).
+        :param started: ``time.monotonic()`` of the first attempt.
+        :return: Seconds to wait before retrying, ``None`` to give up.
+        """
+        if retry > self.total or not self.is_retryable(http_method, error):
+            return None
+        if not self.within_budget(host):
+            return None
+
+        delay = self.retry_after(error)
+        if delay is None:
+            delay = self.backoff(retry)
+        elif delay > self.backoff_max:
+            return None
+
+        if self.deadline is not None and time.monotonic() + delay - started > self.deadline:
+            return None
+        return delay
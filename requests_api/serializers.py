@@ -0,0 +1,87 @@
+import json
+
+from typing import Any, NoReturn, Union
+from requests_api.errors import ConfigurationError
+
+
+class JSONCodec:
+    """ stdlib ``json`` codec, always available """
+    name = "json"
+    decode_errors = (ValueError,)
+
+    def __reduce__(self) -> tuple:
+        # codecs may hold their module, which cannot be pickled, so
+        # worker processes create their own instance instead
+        return type(self), ()
+
+    def dumps(self, obj: Any) -> bytes:
+        """ encodes ``obj`` to a UTF-8 JSON body """
+        return json.dumps(obj).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """ decodes a JSON body """
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """ ``orjson`` codec, encodes straight to ``bytes`` """
+    name = "orjson"
+
+    def __init__(self) -> NoReturn:
+        import orjson
+        self.module = orjson
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.module.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self.module.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """ ``ujson`` codec """
+    name = "ujson"
+
+    def __init__(self) -> NoReturn:
+        import ujson
+        self.module = ujson
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.module.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self.module.loads(data)
+
+
+CODECS = {
+    JSONCodec.name: JSONCodec,
+    OrjsonCodec.name: OrjsonCodec,
+    UjsonCodec.name: UjsonCodec,
+}
+
+# order in which ``"auto"`` looks for an installed codec
+PREFERRED_CODECS = (OrjsonCodec.name, UjsonCodec.name, JSONCodec.name)
+
+
+def get_codec(codec: Union[str, JSONCodec] = "json") -> JSONCodec:
+    """
+    Resolves the JSON codec used to encode request bodies and decode responses.
+
+    Fast codecs fall back to the stdlib ``json`` module when they are not installed.
+
+    :param codec: ``"json"``, ``"orjson"``, ``"ujson"``, ``"auto"`` (fastest installed codec), or
+        any object implementing ``dumps``, ``loads`` and ``decode_errors`` like ``JSONCodec``.
+    :return: Codec object.
+    """
+    if not isinstance(codec, str):
+        return codec
+
+    names = PREFERRED_CODECS if codec == "auto" else (codec, JSONCodec.name)
+    for name in names:
+        if name not in CODECS:
+            raise ConfigurationError(f"Unknown JSON codec '{name}', expected one of {sorted(CODECS)}.")
+        try:
+            return CODECS[name]()
+        except ImportError:
+            continue
+    return JSONCodec()
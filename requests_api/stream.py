@@ -0,0 +1,87 @@
+from typing import Iterator, NoReturn, Optional, Union
+from requests import Response
+from requests_api.lookup import stream_lookup
+from requests_api.serializers import JSONCodec
+
+
+class StreamedResponse:
+    """ iterates over a validated response body without buffering it in memory """
+
+    def __init__(self, response: Response, codec: Optional[JSONCodec] = None) -> NoReturn:
+        """ initialize class """
+        self.response = response
+        self.codec = codec or JSONCodec()
+
+    def __enter__(self) -> "StreamedResponse":
+        return self
+
+    def __exit__(self, *exc_info) -> NoReturn:
+        self.close()
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.iter_bytes()
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self) -> dict:
+        return self.response.headers
+
+    def close(self) -> NoReturn:
+        """ releases the connection back to the pool """
+        self.response.close()
+
+    def iter_bytes(self, chunk_size: int = 65536) -> Iterator[bytes]:
+        """
+        Iterates over the raw (decompressed) body.
+
+        :param chunk_size: Maximum number of bytes per chunk.
+        :return: Iterator of byte chunks.
+        """
+        try:
+            yield from self.response.iter_content(chunk_size=chunk_size)
+        finally:
+            self.close()
+
+    def iter_lines(self, chunk_size: int = 65536, decode_unicode: bool = True) -> Iterator[Union[str, bytes]]:
+        """
+        Iterates over the body one line at a time.
+
+        :param chunk_size: Number of bytes read from the connection at a time.
+        :param decode_unicode: Yield ``str`` lines (``utf-8`` unless the response says otherwise).
+        :return: Iterator of lines, without line endings.
+        """
+        if decode_unicode and self.response.encoding is None:
+            self.response.encoding = "utf-8"
+        try:
+            yield from self.response.iter_lines(chunk_size=chunk_size, decode_unicode=decode_unicode)
+        finally:
+            self.close()
+
+    def iter_ndjson(self, chunk_size: int = 65536) -> Iterator[Union[dict, list]]:
+        """
+        Iterates over a NDJSON / JSON-lines body, one decoded record at a time.
+
+        :param chunk_size: Number of bytes read from the connection at a time.
+        :return: Iterator of decoded records, blank lines are skipped.
+        """
+        for line in self.iter_lines(chunk_size=chunk_size, decode_unicode=False):
+            if line.strip():
+                yield self.codec.loads(line)
+
+    def lookup(self, search_keys: list, chunk_size: int = 65536) -> list:
+        """
+        Extracts ``search_keys`` from a JSON body in a single pass, without decoding the whole document.
+
+        :param search_keys: Keys to search for at any depth of the document.
+        :param chunk_size: Number of bytes read from the connection at a time.
+        :return: Flattened list of matched values, same as ``nested_lookup`` per key.
+        """
+        # read through urllib3 so compressed bodies are inflated on the fly
+        self.response.raw.decode_content = True
+        try:
+            return stream_lookup(search_keys, self.response.raw, chunk_size)
+        finally:
+            self.close()
@@ -0,0 +1,262 @@
+import threading
+
+from http.client import HTTPMessage
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, AsyncIterator, Iterable, Iterator, NoReturn, Optional, Union, TextIO
+from requests import Response, PreparedRequest
+from requests.adapters import BaseAdapter
+from requests.exceptions import (
+    ConnectTimeout,
+    ReadTimeout,
+    Timeout,
+    ConnectionError,
+    ChunkedEncodingError,
+    RequestException,
+)
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from requests_api.errors import ConfigurationError
+
+# ``httpx`` and ``asyncio`` are only imported once an ``HTTP2Adapter`` is
+# created, every other function here handles objects created by one
+
+
+# supported transports
+HTTP1 = "http1"
+HTTP2 = "http2"
+
+# auth types that rely on a connection-level handshake through
+# ``requests`` response hooks, which multiplexed and asyncio connections cannot run
+HANDSHAKE_AUTH_TYPES = ("HttpNtlmAuth", "HTTPKerberosAuth")
+
+
+def to_requests_exception(exception: Exception, request: Optional[PreparedRequest] = None) -> RequestException:
+    """ maps a ``httpx`` exception to the ``requests`` exception raised for the same failure """
+    import httpx
+    message = str(exception) or type(exception).__name__
+    if isinstance(exception, httpx.ConnectTimeout):
+        return ConnectTimeout(message, request=request)
+    if isinstance(exception, (httpx.ReadTimeout, httpx.WriteTimeout)):
+        return ReadTimeout(message, request=request)
+    if isinstance(exception, httpx.TimeoutException):
+        return Timeout(message, request=request)
+    if isinstance(exception, (httpx.NetworkError, httpx.ProtocolError)):
+        return ConnectionError(message, request=request)
+    return RequestException(message, request=request)
+
+
+class RejectCookies(DefaultCookiePolicy):
+    """ cookie policy of the ``httpx`` client, which leaves every cookie to the jar of the session """
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+    def return_ok(self, cookie, request) -> bool:
+        return False
+
+
+class OriginalResponse:
+    """ headers of a ``httpx`` response held like those of ``http.client``, where ``requests`` reads ``Set-Cookie`` """
+
+    def __init__(self, headers) -> NoReturn:
+        """ initialize class """
+        self.msg = HTTPMessage()
+        for name, value in headers.multi_items():
+            self.msg[name] = value
+
+
+class HTTPXRawResponse:
+    """ file-like body of a streamed ``httpx`` response, used as ``requests.Response.raw`` """
+
+    def __init__(self, response, adapter: "HTTP2Adapter") -> NoReturn:
+        """ initialize class """
+        self.response = response
+        self.adapter = adapter
+        self.chunks = response.aiter_bytes()
+        self.buffer = b""
+        self.decode_content = True
+
+    @property
+    def _original_response(self) -> OriginalResponse:
+        """ read by ``requests.cookies.extract_cookies_to_jar`` to store the cookies in the session """
+        return OriginalResponse(self.response.headers)
+
+    def next_chunk(self) -> Optional[bytes]:
+        """ next decoded body chunk, ``None`` once the body was read """
+        import httpx
+        try:
+            return self.adapter.call(next_chunk(self.chunks))
+        except httpx.RemoteProtocolError as exception:
+            # the server closed the stream before the whole body was sent
+            raise ChunkedEncodingError(str(exception))
+        except httpx.HTTPError as exception:
+            raise to_requests_exception(exception)
+
+    def read(self, amt: Optional[int] = None, decode_content: Optional[bool] = None) -> bytes:
+        """ reads up to ``amt`` bytes of the (decompressed) body, everything left when omitted """
+        while amt is None or len(self.buffer) < amt:
+            chunk = self.next_chunk()
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if amt is None:
+            amt = len(self.buffer)
+        data, self.buffer = self.buffer[:amt], self.buffer[amt:]
+        return data
+
+    def stream(self, amt: int = 65536, decode_content: Optional[bool] = None) -> Iterator[bytes]:
+        """ yields the body in chunks of at most ``amt`` bytes, used by ``Response.iter_content`` """
+        while True:
+            data = self.read(amt)
+            if not data:
+                break
+            yield data
+
+    def close(self) -> NoReturn:
+        if not self.response.is_closed:
+            self.adapter.call(self.response.aclose())
+
+
+async def next_chunk(chunks) -> Optional[bytes]:
+    """ awaits the next chunk of an async iterator, ``None`` once exhausted """
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def iter_body(body: Union[memoryview, Iterable[bytes]], chunk_size: int = 65536) -> Iterator[bytes]:
+    """ splits a ``memoryview`` or file object body into ``bytes`` chunks, other iterables are yielded as they are """
+    if isinstance(body, memoryview):
+        for start in range(0, body.nbytes, chunk_size):
+            yield bytes(body[start:start + chunk_size])
+    elif hasattr(body, "read"):
+        yield from iter(lambda: body.read(chunk_size), b"")
+    else:
+        yield from body
+
+
+async def aiterate(iterable: Iterable[bytes]) -> AsyncIterator[bytes]:
+    """ streams a (generator) request body, which an ``httpx.AsyncClient`` only accepts as an async iterator """
+    for chunk in iterable:
+        yield chunk
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    Transport adapter sending requests over HTTP/2 with ``httpx``, mounted on a ``requests`` session.
+
+    Concurrent requests to a host are multiplexed as streams over one connection, instead of
+    needing a socket (and TLS session) each. Over ``https`` the protocol is negotiated with ALPN,
+    falling back to HTTP/1.1 for servers without HTTP/2 support unless ``http1`` is disabled, in
+    which case ``http`` URLs are sent with prior knowledge (h2c).
+
+    The connections are driven by an event loop running in a background thread, so requests
+    submitted from any number of threads share them without interleaving their frames. Redirects,
+    auth, hooks and cookies are still handled by the session (the ``httpx`` client keeps no
+    cookies), connection errors and timeouts are raised as their ``requests`` counterparts.
+
+    :param verify: Verify the TLS certificate of the server, or path of a CA bundle.
+    :param max_connections: Maximum number of connections, ``None`` for no limit.
+    :param max_keepalive_connections: Maximum number of idle connections kept open.
+    :param http1: Allow HTTP/1.1, ``False`` requires HTTP/2 (prior knowledge over ``http``).
+    """
+
+    def __init__(
+        self,
+        verify: Optional[Union[bool, TextIO]] = True,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = 10,
+        http1: Optional[bool] = True
+    ) -> NoReturn:
+        """ initialize class """
+        try:
+            import httpx
+        except ImportError:
+            raise ConfigurationError("HTTP/2 requires 'httpx[http2]', install with 'requests-api[http2]'.")
+        super().__init__()
+        self.client = httpx.AsyncClient(
+            http1=http1,
+            http2=True,
+            verify=verify,
+            follow_redirects=False,
+            cookies=CookieJar(RejectCookies()),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            )
+        )
+
+        # the event loop thread is started by the first request, so adapters
+        # created in a forked child (or never used) cost no thread
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self) -> NoReturn:
+        """ starts the event loop of the adapter in a background thread """
+        import asyncio
+        with self.lock:
+            if self.loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=loop.run_forever, name="requests-api-http2", daemon=True)
+            self.thread.start()
+            self.loop = loop
+
+    def call(self, coroutine) -> Any:
+        """ runs ``coroutine`` on the event loop of the adapter and waits for its result """
+        import asyncio
+        if self.loop is None:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Optional[Union[float, tuple]] = None,
+        verify: Union[bool, str] = True,
+        cert: Optional[Union[str, tuple]] = None,
+        proxies: Optional[dict] = None
+    ) -> Response:
+        """ sends a prepared request, ``verify``, ``cert`` and ``proxies`` are set on the adapter """
+        import httpx
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        try:
+            response = self.call(self.client.send(
+                self.client.build_request(
+                    request.method,
+                    request.url,
+                    headers=list(request.headers.items()),
+                    content=request.body if request.body is None or isinstance(request.body, (bytes, str))
+                    else aiterate(iter_body(request.body)),
+                    timeout=httpx.Timeout(read, connect=connect)
+                ),
+                stream=True
+            ))
+        except httpx.HTTPError as exception:
+            raise to_requests_exception(exception, request)
+        return self.build_response(request, response)
+
+    def build_response(self, request: PreparedRequest, response) -> Response:
+        """ wraps a streamed ``httpx`` response in a ``requests.Response`` """
+        built = Response()
+        built.status_code = response.status_code
+        built.headers = CaseInsensitiveDict(response.headers)
+        built.encoding = get_encoding_from_headers(built.headers)
+        built.raw = HTTPXRawResponse(response, self)
+        built.reason = response.reason_phrase
+        built.url = request.url
+        built.request = request
+        built.connection = self
+        return built
+
+    def close(self) -> NoReturn:
+        """ closes every connection and stops the event loop """
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.call(self.client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
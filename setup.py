@@ -14,12 +14,20 @@ setup(
     package_dir={"requests_api": "requests_api"},
     install_requires=[
         "urllib3",
-        "nested-lookup",
         "requests>=2.25",
-        "requests-oauthlib>=1.3",
-        "requests-ntlm3",
-        "requests-kerberos>=0.12",
     ],
+    extras_require={
+        "oauth": ["requests-oauthlib>=1.3"],
+        "ntlm": ["requests-ntlm3"],
+        "kerberos": ["requests-kerberos>=0.12"],
+        "async": ["httpx"],
+        "http2": ["httpx[http2]"],
+        "stream": ["ijson>=3.1"],
+        "orjson": ["orjson"],
+        "ujson": ["ujson"],
+        "brotli": ["brotli"],
+        "zstd": ["zstandard"],
+    },
     author="Deric Degagne",
     author_email="deric.degagne@gmail.com",
     description="HTTP requests library.",